@@ -0,0 +1,37 @@
+"""add stats lookup indexes, drop redundant poop_events indexes
+
+Revision ID: add_stats_lookup_indexes
+Revises: add_chat_notifications_enabled
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+
+revision = "add_stats_lookup_indexes"
+down_revision = "add_chat_notifications_enabled"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Composite primary keys lead with chat_id/session_id; per-user stats and deletes filter on user_id alone.
+    op.create_index("ix_session_user_state_user", "session_user_state", ["user_id", "session_id"])
+    op.create_index("ix_user_streaks_user", "user_streaks", ["user_id"])
+    op.create_index("ix_chat_members_user", "chat_members", ["user_id"])
+    # Global stats scan sessions by date range across all chats.
+    op.create_index("ix_sessions_session_date", "sessions", ["session_date"])
+
+    # Both are prefixes of uq_poop_event_per_user and only add write cost.
+    op.drop_index("ix_poop_events_session_user_n", table_name="poop_events")
+    op.drop_index("ix_poop_events_session_user", table_name="poop_events")
+
+
+def downgrade() -> None:
+    op.create_index("ix_poop_events_session_user", "poop_events", ["session_id", "user_id"])
+    op.create_index("ix_poop_events_session_user_n", "poop_events", ["session_id", "user_id", "event_n"])
+
+    op.drop_index("ix_sessions_session_date", table_name="sessions")
+    op.drop_index("ix_chat_members_user", table_name="chat_members")
+    op.drop_index("ix_user_streaks_user", table_name="user_streaks")
+    op.drop_index("ix_session_user_state_user", table_name="session_user_state")
@@ -0,0 +1,44 @@
+"""server-side UTC defaults for timestamp columns
+
+Revision ID: utc_server_defaults
+Revises: add_stats_lookup_indexes
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "utc_server_defaults"
+down_revision = "add_stats_lookup_indexes"
+branch_labels = None
+depends_on = None
+
+UTC_NOW = sa.text("timezone('utc', now())")
+
+COLUMNS = (
+    ("chats", "created_at"),
+    ("users", "updated_at"),
+    ("chat_members", "joined_at"),
+    ("sessions", "start_at"),
+    ("session_user_state", "updated_at"),
+    ("rate_limits", "last_action_at"),
+)
+# Created with server_default=now(), which follows the connection TimeZone rather than UTC.
+NOW_COLUMNS = (
+    ("poop_events", "created_at"),
+    ("poop_events", "updated_at"),
+    ("command_messages", "created_at"),
+)
+
+
+def upgrade() -> None:
+    for table, column in COLUMNS + NOW_COLUMNS:
+        op.alter_column(table, column, server_default=UTC_NOW)
+
+
+def downgrade() -> None:
+    for table, column in NOW_COLUMNS:
+        op.alter_column(table, column, server_default=sa.func.now())
+    for table, column in COLUMNS:
+        op.alter_column(table, column, server_default=None)
@@ -7,9 +7,10 @@ from aiogram import Bot, Dispatcher
 from aiogram import BaseMiddleware
 from aiogram.enums import ParseMode
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
 
 from app.core.config import Settings
-from app.db.engine import make_engine, make_session_factory
+from app.db.engine import make_engine, make_session_factory, warm_up_engine
 from app.services.scheduler_service import start_scheduler
 
 from app.bot.handlers.commands import router as commands_router
@@ -20,6 +21,11 @@ from app.bot.handlers.callbacks_help import router as callbacks_help_router
 from app.bot.handlers.callbacks_recap import router as callbacks_recap_router
 from app.bot.handlers.callbacks_stats import router as callbacks_stats_router
 
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json otherwise
+    orjson = None
+
 
 class _UpdateActivityMiddleware(BaseMiddleware):
     def __init__(self, on_update: Callable[[], None]) -> None:
@@ -53,16 +59,26 @@ async def _heartbeat_loop(
             logger.debug("Heartbeat ok, last handled update %ss ago", idle_sec)
 
 
+def _orjson_dumps(obj: Any) -> str:
+    return orjson.dumps(obj).decode()
+
+
 async def run_bot(settings: Settings) -> None:
+    session = AiohttpSession(json_loads=orjson.loads, json_dumps=_orjson_dumps) if orjson is not None else None
     bot = Bot(
         token=settings.bot_token,
+        session=session,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML),
     )
 
-    engine = make_engine(settings.database_url)
+    engine = make_engine(
+        settings.database_url, pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow
+    )
+    await asyncio.to_thread(warm_up_engine, engine)
     session_factory = make_session_factory(engine)
 
-    dp = Dispatcher()
+    # Shared with handlers through aiogram workflow data (injected by argument name).
+    dp = Dispatcher(settings=settings, session_factory=session_factory)
     dp.include_router(commands_router)
     dp.include_router(callbacks_q1_router)
     dp.include_router(callbacks_q2_router)
@@ -101,3 +117,5 @@ async def run_bot(settings: Settings) -> None:
             await hb_task
         with contextlib.suppress(Exception):
             await bot.session.close()
+        with contextlib.suppress(Exception):
+            await asyncio.to_thread(engine.dispose)
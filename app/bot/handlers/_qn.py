@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+from datetime import date
+from typing import Any, Awaitable, Callable, Literal
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.bot.keyboards.q1 import q1_keyboard
+from app.db.models import UTC_NOW, PoopEvent, Session as DaySession, SessionMessage, SessionUserState
+from app.db.session import db_session
+from app.services.q1_service import render_q1
+from app.services.rate_limit_service import check_db_rate_limit, check_local_rate_limit
+from app.services.repo_service import (
+    get_or_create_session,
+    get_session_message_id,
+    upsert_chat,
+    upsert_user,
+)
+from app.services.time_service import get_session_window
+
+logger = logging.getLogger(__name__)
+
+
+Q1_REFRESH_DELAY_SEC = 0.25
+
+_Q1_EDIT_IGNORED_ERRORS = (
+    "message is not modified",
+    "message to edit not found",
+    "message not found",
+    "message_id_invalid",
+)
+
+# (chat_id, q1_message_id) of Q1 refreshes that are scheduled but have not rendered yet
+_pending_q1_refresh: set[tuple[int, int]] = set()
+_q1_refresh_tasks: set[asyncio.Task] = set()
+
+
+def _schedule_q1_refresh(
+    bot: Bot,
+    session_factory: sessionmaker,
+    chat_id: int,
+    session_id: int,
+    session_date: date,
+    q1_msg_id: int,
+    scope: str,
+) -> None:
+    key = (chat_id, q1_msg_id)
+    if key in _pending_q1_refresh:
+        # The pending refresh renders after its delay and will include this click too.
+        return
+    _pending_q1_refresh.add(key)
+    task = asyncio.create_task(
+        _refresh_q1(bot, session_factory, chat_id, session_id, session_date, q1_msg_id, scope)
+    )
+    _q1_refresh_tasks.add(task)
+    task.add_done_callback(_q1_refresh_tasks.discard)
+
+
+async def _refresh_q1(
+    bot: Bot,
+    session_factory: sessionmaker,
+    chat_id: int,
+    session_id: int,
+    session_date: date,
+    q1_msg_id: int,
+    scope: str,
+) -> None:
+    try:
+        await asyncio.sleep(Q1_REFRESH_DELAY_SEC)
+    finally:
+        _pending_q1_refresh.discard((chat_id, q1_msg_id))
+
+    try:
+        with db_session(session_factory) as db:
+            q1 = render_q1(db, chat_id=chat_id, session_id=session_id, session_date=session_date)
+        await bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=q1_msg_id,
+            text=q1.text,
+            reply_markup=q1_keyboard(q1.has_members),
+        )
+    except TelegramBadRequest as e:
+        msg = e.message.lower()
+        if any(fragment in msg for fragment in _Q1_EDIT_IGNORED_ERRORS):
+            return
+        logger.exception("Failed to edit Q1 from %s: %s", scope, e)
+    except Exception:
+        logger.exception("Failed to refresh Q1 from %s", scope)
+
+
+def qn_data_pattern(prefix: str, choices: frozenset[str]) -> re.Pattern[str]:
+    """Full callback data grammar: `<prefix>:<choice>`, `<prefix>:sel:<n>`, `<prefix>:set:<n>:<choice>`."""
+    alt = "|".join(sorted(map(re.escape, choices)))
+    return re.compile(rf"^{prefix}:(?:(?:{alt})|sel:\d+|set:\d+:(?:{alt}))$")
+
+
+def parse_qn(data: str, choices: frozenset[str]) -> tuple[int | None, str | None]:
+    """(explicitly selected event_n or None for the latest one, choice or None)"""
+    parts = data.split(":")
+    if len(parts) == 2 and parts[1] in choices:
+        return None, parts[1]
+    if len(parts) == 3 and parts[1] == "sel":
+        try:
+            return int(parts[2]), None
+        except ValueError:
+            return None, None
+    if len(parts) == 4 and parts[1] == "set":
+        choice = parts[3] if parts[3] in choices else None
+        try:
+            return int(parts[2]), choice
+        except ValueError:
+            return None, choice
+    return None, None
+
+
+def make_qn_handler(
+    scope: Literal["Q2", "Q3"],
+    field: Literal["bristol", "feeling"],
+    choices: frozenset[str],
+    to_value: Callable[[str], Any],
+    from_value: Callable[[Any], str | None],
+    choice_icon: Callable[[str | None], str],
+    render_text: Callable[[Session, int, int], str],
+    keyboard: Callable[..., InlineKeyboardMarkup],
+) -> Callable[[CallbackQuery, sessionmaker], Awaitable[None]]:
+    async def qn_callbacks(cb: CallbackQuery, session_factory: sessionmaker) -> None:
+        if cb.message is None or cb.from_user is None:
+            return
+
+        chat_id = cb.message.chat.id
+        user = cb.from_user
+
+        # Malformed data never gets here (see qn_data_pattern); repeated taps are cut
+        # before a connection is checked out.
+        if not check_local_rate_limit(chat_id=chat_id, user_id=user.id, scope=scope, cooldown_seconds=2):
+            await cb.answer("Не так быстро, здоровяк", show_alert=False)
+            return
+
+        with db_session(session_factory) as db:
+            chat = upsert_chat(db, chat_id)
+            window = get_session_window(chat.timezone)
+
+            if window.is_blocked_window:
+                await cb.answer("Новая сессия начнётся в 00:05", show_alert=False)
+                return
+
+            if not check_db_rate_limit(db, chat_id=chat_id, user_id=user.id, scope=scope, cooldown_seconds=2):
+                await cb.answer("Не так быстро, здоровяк", show_alert=False)
+                return
+
+            upsert_user(db, user_id=user.id, username=user.username, first_name=user.first_name, last_name=user.last_name)
+            sess = db.scalar(
+                select(DaySession)
+                .join(SessionMessage, SessionMessage.session_id == DaySession.session_id)
+                .where(
+                    DaySession.chat_id == chat_id,
+                    SessionMessage.kind == scope,
+                    SessionMessage.message_id == cb.message.message_id,
+                )
+            )
+            if sess is None:
+                sess = get_or_create_session(db, chat_id=chat_id, session_date=window.session_date)
+
+            if sess.status == "closed":
+                await cb.answer("Сессия закрыта", show_alert=False)
+                return
+
+            q1_msg_id = get_session_message_id(db, sess.session_id, "Q1")
+            if not q1_msg_id:
+                await cb.answer("Неактуально", show_alert=False)
+                return
+
+            qn_msg_id = get_session_message_id(db, sess.session_id, scope)
+            if qn_msg_id and cb.message.message_id != qn_msg_id:
+                await cb.answer("Неактуально", show_alert=False)
+                return
+
+            explicit_n, selected_choice = parse_qn(cb.data, choices)
+            state_key = (SessionUserState.session_id == sess.session_id, SessionUserState.user_id == user.id)
+            state_field = getattr(SessionUserState, field)
+
+            if selected_choice:
+                # Single-column writes go straight through Core: no ORM row load, no flush.
+                value = to_value(selected_choice)
+                poops_n = db.scalar(
+                    update(SessionUserState)
+                    .where(*state_key, SessionUserState.poops_n > 0)
+                    .values({state_field: value})
+                    .returning(SessionUserState.poops_n)
+                )
+            else:
+                poops_n = db.scalar(select(SessionUserState.poops_n).where(*state_key))
+
+            if not poops_n:
+                await cb.answer("Ты не какал", show_alert=False)
+                return
+
+            selected_n = explicit_n if explicit_n is not None and 1 <= explicit_n <= poops_n else poops_n
+
+            if selected_choice:
+                db.execute(
+                    pg_insert(PoopEvent)
+                    .values(session_id=sess.session_id, user_id=user.id, event_n=selected_n, **{field: value})
+                    .on_conflict_do_update(
+                        index_elements=["session_id", "user_id", "event_n"],
+                        set_={field: value, "updated_at": UTC_NOW},
+                    )
+                )
+                active_choice = selected_choice
+                await cb.answer(f"Записал для тебя: #{selected_n} {choice_icon(selected_choice)}", show_alert=False)
+            else:
+                active_choice = from_value(
+                    db.scalar(
+                        select(getattr(PoopEvent, field)).where(
+                            PoopEvent.session_id == sess.session_id,
+                            PoopEvent.user_id == user.id,
+                            PoopEvent.event_n == selected_n,
+                        )
+                    )
+                )
+                await cb.answer()
+
+            try:
+                await cb.message.edit_text(
+                    render_text(db, chat_id, sess.session_id),
+                    reply_markup=keyboard(selected_choice=active_choice),
+                )
+            except TelegramBadRequest as e:
+                if "message is not modified" not in e.message.lower():
+                    logger.exception("Failed to edit %s text: %s", scope, e)
+
+            session_id = sess.session_id
+            session_date = window.session_date
+
+        # Scheduled after the session is committed so the refresh sees this click.
+        _schedule_q1_refresh(cb.bot, session_factory, chat_id, session_id, session_date, q1_msg_id, scope)
+
+    return qn_callbacks
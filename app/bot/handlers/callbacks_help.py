@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import logging
+from functools import lru_cache
 
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery
+from sqlalchemy.orm import sessionmaker
 
 from app.bot.keyboards.help import (
     help_delete_chat_confirm_kb,
@@ -15,7 +17,6 @@ from app.bot.keyboards.help import (
     help_settings_kb,
 )
 from app.bot.keyboards.q1 import q1_keyboard
-from app.db.engine import make_engine, make_session_factory
 from app.db.session import db_session
 from app.services.help_service import (
     delete_user_everywhere,
@@ -27,26 +28,17 @@ from app.services.help_service import (
 from app.services.q1_service import render_q1
 from app.services.q2_q3_service import ensure_q2_q3_exist
 from app.services.repo_service import get_or_create_session, get_session_message_id, upsert_chat
-from app.services.time_service import get_session_window, now_in_tz
+from app.services.time_service import get_session_window
 
 logger = logging.getLogger(__name__)
 router = Router()
 
-_engine = None
-_session_factory = None
-
-
-def init_db(database_url: str) -> None:
-    global _engine, _session_factory
-    if _engine is None:
-        _engine = make_engine(database_url)
-        _session_factory = make_session_factory(_engine)
-
 
 def _parse_owner(data: str) -> int:
     return int(data.split(":")[-1])
 
 
+@lru_cache(maxsize=64)
 def _root_text(tz_name: str) -> str:
     return (
         "ℹ️ Помощь\n\n"
@@ -66,6 +58,7 @@ def _root_text(tz_name: str) -> str:
     )
 
 
+@lru_cache(maxsize=2)
 def _settings_text(is_private_chat: bool) -> str:
     base = (
         "⚙️ Настройки\n\n"
@@ -87,6 +80,7 @@ def _settings_text(is_private_chat: bool) -> str:
     return base
 
 
+@lru_cache(maxsize=64)
 def _notifications_text(enabled: bool, post_time_text: str) -> str:
     status_line = (
         f"Текущий статус: <b>включены</b> (время публикации: <b>{post_time_text}</b>)."
@@ -104,6 +98,7 @@ def _notifications_text(enabled: bool, post_time_text: str) -> str:
     )
 
 
+@lru_cache(maxsize=2)
 def _global_visibility_text(enabled: bool) -> str:
     state = "включена" if enabled else "выключена"
     return (
@@ -136,22 +131,18 @@ ABOUT_TEXT = (
 
 
 @router.callback_query(F.data.startswith("help:"))
-async def help_callbacks(cb: CallbackQuery) -> None:
+async def help_callbacks(cb: CallbackQuery, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.from_user is None:
         return
 
-    from app.core.config import load_settings
-
-    settings = load_settings()
-    init_db(settings.database_url)
-
     data = cb.data
     chat_id = cb.message.chat.id
     actor_id = cb.from_user.id
     is_private_chat = cb.message.chat.type == "private"
     owner_id = actor_id
 
-    with db_session(_session_factory) as db:
+    with db_session(session_factory) as db:
+        # The setters below mutate this same identity-mapped Chat; the UPDATE goes out with the commit.
         chat = upsert_chat(db, chat_id)
 
         try:
@@ -184,8 +175,6 @@ async def help_callbacks(cb: CallbackQuery) -> None:
                 or data.startswith("help:notifications_off:")
             ):
                 set_chat_notifications_enabled(db, chat_id, not bool(chat.notifications_enabled))
-                db.flush()
-                chat = upsert_chat(db, chat_id)
                 await cb.message.edit_text(
                     _notifications_text(bool(chat.notifications_enabled), chat.post_time.strftime("%H:%M")),
                     parse_mode="HTML",
@@ -217,8 +206,6 @@ async def help_callbacks(cb: CallbackQuery) -> None:
                     await cb.answer("В личке этот пункт недоступен", show_alert=False)
                     return
                 set_chat_global_visibility(db, chat_id, not bool(chat.show_in_global))
-                db.flush()
-                chat = upsert_chat(db, chat_id)
                 await cb.message.edit_text(
                     _global_visibility_text(bool(chat.show_in_global)),
                     parse_mode="HTML",
@@ -229,8 +216,6 @@ async def help_callbacks(cb: CallbackQuery) -> None:
             elif data.startswith("help:time:"):
                 hour = int(data.split(":")[2])
                 set_chat_post_time(db, chat_id, hour)
-                db.flush()
-                chat = upsert_chat(db, chat_id)
                 await cb.answer("Готово", show_alert=False)
                 await cb.message.edit_text(
                     _notifications_text(bool(chat.notifications_enabled), chat.post_time.strftime("%H:%M")),
@@ -287,18 +272,13 @@ async def help_callbacks(cb: CallbackQuery) -> None:
                     sess = get_or_create_session(db, chat_id=chat_id, session_date=window.session_date)
                     q1_id = get_session_message_id(db, sess.session_id, "Q1")
                     if q1_id and sess.status != "closed":
-                        text = render_q1(db, chat_id=chat_id, session_id=sess.session_id, session_date=window.session_date)
-                        has_any_members = "Участники:" in text
+                        q1 = render_q1(db, chat_id=chat_id, session_id=sess.session_id, session_date=window.session_date)
                         try:
                             await cb.bot.edit_message_text(
                                 chat_id=chat_id,
                                 message_id=q1_id,
-                                text=text,
-                                reply_markup=q1_keyboard(
-                                    has_any_members,
-                                    show_remind=get_session_window(chat.timezone).is_blocked_window is False
-                                    and now_in_tz(chat.timezone).time().hour < 22,
-                                ),
+                                text=q1.text,
+                                reply_markup=q1_keyboard(q1.has_members),
                             )
                         except TelegramBadRequest as e:
                             if "message is not modified" not in str(e).lower():
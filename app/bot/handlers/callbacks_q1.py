@@ -6,9 +6,9 @@ from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery
 from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
 
 from app.bot.keyboards.q1 import q1_keyboard
-from app.db.engine import make_engine, make_session_factory
 from app.db.models import CommandMessage, Session as DaySession, SessionMessage, SessionUserState
 from app.db.session import db_session
 from app.services.command_message_service import (
@@ -33,16 +33,6 @@ from app.services.time_service import get_session_window, now_in_tz
 logger = logging.getLogger(__name__)
 router = Router()
 
-_engine = None
-_session_factory = None
-
-
-def init_db(database_url: str) -> None:
-    global _engine, _session_factory
-    if _engine is None:
-        _engine = make_engine(database_url)
-        _session_factory = make_session_factory(_engine)
-
 
 def _resolve_reminder_context(db, chat_id: int, current_sess, cb: CallbackQuery, command: str) -> bool:
     current_q1_msg_id = get_session_message_id(db, current_sess.session_id, "Q1")
@@ -70,22 +60,18 @@ def _resolve_reminder_context(db, chat_id: int, current_sess, cb: CallbackQuery,
 
 
 @router.callback_query(F.data.in_({"q1:plus", "q1:minus", "q1:plus_reminder", "q1:plus_late"}))
-async def q1_callbacks(cb: CallbackQuery) -> None:
+async def q1_callbacks(cb: CallbackQuery, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.from_user is None:
         return
 
-    from app.core.config import load_settings
-
-    settings = load_settings()
-    init_db(settings.database_url)
-
     chat_id = cb.message.chat.id
     user = cb.from_user
 
     try:
-        with db_session(_session_factory) as db:
+        with db_session(session_factory) as db:
             chat = upsert_chat(db, chat_id=chat_id)
-            window = get_session_window(chat.timezone)
+            now_local = now_in_tz(chat.timezone)
+            window = get_session_window(chat.timezone, now=now_local)
 
             if window.is_blocked_window:
                 await cb.answer("Новая сессия начнётся в 00:05", show_alert=False)
@@ -97,9 +83,9 @@ async def q1_callbacks(cb: CallbackQuery) -> None:
 
             upsert_user(db, user_id=user.id, username=user.username, first_name=user.first_name, last_name=user.last_name)
             db.flush()
-            current_sess = get_or_create_session(db, chat_id=chat_id, session_date=window.session_date)
 
             if cb.data in {"q1:plus_reminder", "q1:plus_late"}:
+                current_sess = get_or_create_session(db, chat_id=chat_id, session_date=window.session_date)
                 reminder_command = REMINDER22_COMMAND if cb.data == "q1:plus_reminder" else LATE_REMINDER_COMMAND
                 if not _resolve_reminder_context(db, chat_id, current_sess, cb, reminder_command):
                     await cb.answer("Неактуально", show_alert=False)
@@ -153,7 +139,7 @@ async def q1_callbacks(cb: CallbackQuery) -> None:
             else:
                 ensure_chat_member(db, chat_id=chat_id, user_id=user.id)
                 ok, popup = apply_plus(db, sess.session_id, user.id)
-                if ok and now_in_tz(chat.timezone).time().hour < 11:
+                if ok and now_local.hour < 11:
                     popup = "Кофейку и цигарку бахнул? Красава"
                 await cb.answer(popup, show_alert=False)
 
@@ -167,21 +153,25 @@ async def q1_callbacks(cb: CallbackQuery) -> None:
 
             db.commit()
 
-            text = render_q1(db, chat_id=chat_id, session_id=sess.session_id, session_date=sess.session_date)
-            has_any_members = "Участники:" in text
+            q1 = render_q1(
+                db,
+                chat_id=chat_id,
+                session_id=sess.session_id,
+                session_date=sess.session_date,
+            )
             try:
                 if q1_msg_id:
                     await cb.bot.edit_message_text(
                         chat_id=chat_id,
                         message_id=q1_msg_id,
-                        text=text,
-                        reply_markup=q1_keyboard(has_any_members),
+                        text=q1.text,
+                        reply_markup=q1_keyboard(q1.has_members),
                     )
                 else:
                     sent = await cb.bot.send_message(
                         chat_id=chat_id,
-                        text=text,
-                        reply_markup=q1_keyboard(has_any_members),
+                        text=q1.text,
+                        reply_markup=q1_keyboard(q1.has_members),
                     )
                     set_session_message_id(db, sess.session_id, "Q1", sent.message_id)
             except TelegramBadRequest as e:
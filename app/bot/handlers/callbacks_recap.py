@@ -2,30 +2,37 @@ from __future__ import annotations
 
 import logging
 import re
+from datetime import date, datetime, timezone
+from typing import Awaitable, Callable
 
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.bot.keyboards.recap import recap_chat_card_kb, recap_chat_pick_mode_kb, recap_entry_kb, recap_next_kb
-from app.db.engine import make_engine, make_session_factory
-from app.db.session import db_session
+from app.core.config import Settings
+from app.db.session import run_in_session
+from app.services.chat_title_service import fetch_chat_titles
 from app.services.recap_service import (
     build_chat_year_recap_cards,
     build_my_year_recap_cards,
     build_my_year_recap_cards_all_chats,
+    has_user_recap_in_chat,
     is_recap_available,
+    is_recap_season_near,
+    is_user_chat_member,
     list_user_member_chat_ids,
-    list_user_recap_chat_ids,
+    recap_cards_cache,
     recap_target_year,
 )
+from app.services.repo_service import get_chat_timezone
 from app.services.time_service import now_in_tz
 
 logger = logging.getLogger(__name__)
 router = Router()
 
-_engine = None
-_session_factory = None
+_CHAT_ID_RE = re.compile(r"Чат (-?\d+)")
 
 GROUP_MENU_TEXT = (
     "🎉 Рекап года\n\n"
@@ -43,15 +50,9 @@ OWNER_PRIVATE_MENU_TEXT = (
 )
 
 
-def init_db(database_url: str) -> None:
-    global _engine, _session_factory
-    if _engine is None:
-        _engine = make_engine(database_url)
-        _session_factory = make_session_factory(_engine)
-
-
-def _is_owner(settings, user_id: int) -> bool:
-    return settings.bot_owner_id is not None and int(settings.bot_owner_id) == int(user_id)
+def _is_owner(settings: Settings, user_id: int) -> bool:
+    # load_settings already parses bot_owner_id to int | None, and a user id is never None.
+    return settings.bot_owner_id == user_id
 
 
 def _format_chat_title(raw: str, fallback_id: int) -> str:
@@ -86,44 +87,87 @@ async def _notify_open_dm_in_group(cb: CallbackQuery) -> None:
 
 
 async def _resolve_chat_options(cb: CallbackQuery, chat_ids: list[int]) -> list[tuple[int, str]]:
-    options: list[tuple[int, str]] = []
-    for cid in chat_ids:
-        try:
-            chat = await cb.bot.get_chat(cid)
-            title = getattr(chat, "title", None) or getattr(chat, "full_name", None) or ""
-        except Exception:
-            title = ""
-        options.append((cid, _format_chat_title(title, cid)))
-    return options
+    titles = await fetch_chat_titles(cb.bot, chat_ids)
+    return [(cid, _format_chat_title(titles.get(cid) or "", cid)) for cid in chat_ids]
 
 
 async def _enrich_chat_titles(cards: list[str], cb: CallbackQuery) -> list[str]:
-    ids = {int(x) for x in re.findall(r"Чат (-?\d+)", "\n".join(cards))}
+    ids = {int(m.group(1)) for card in cards for m in _CHAT_ID_RE.finditer(card)}
     if not ids:
         return cards
-    titles: dict[int, str] = {}
-    for cid in ids:
-        try:
-            chat = await cb.bot.get_chat(cid)
-            title = getattr(chat, "title", None) or getattr(chat, "full_name", None) or f"Чат {cid}"
-            titles[cid] = str(title).strip()
-        except Exception:
-            titles[cid] = f"Чат {cid}"
-
-    out: list[str] = []
-    for card in cards:
-        text = card
-        for cid, title in titles.items():
-            text = text.replace(f"Чат {cid}", title)
-        out.append(text)
-    return out
-
-
-async def _send_personal_recap_to_dm(cb: CallbackQuery, source_chat_id: int, year: int) -> bool:
+    titles = {
+        cid: str(title).strip() if title else f"Чат {cid}"
+        for cid, title in (await fetch_chat_titles(cb.bot, ids)).items()
+    }
+
+    def _title(m: re.Match[str]) -> str:
+        return titles.get(int(m.group(1)), m.group(0))
+
+    return [_CHAT_ID_RE.sub(_title, card) for card in cards]
+
+
+async def _cached_cards(key: tuple, build: Callable[[], Awaitable[list[str] | None]]) -> list[str] | None:
+    """None from build means "not allowed" and is never cached."""
+    cards = recap_cards_cache.get(key)
+    if cards is not None:
+        return cards
+
+    cards = await build()
+    if cards is not None:
+        recap_cards_cache.set(key, cards)
+    return cards
+
+
+def _build_chat_cards(db: Session, source_chat_id: int, year: int, member_id: int | None) -> list[str] | None:
+    # Permission check and card build share one session.
+    if member_id is not None and not is_user_chat_member(db, member_id, source_chat_id):
+        return None
+    return build_chat_year_recap_cards(db, chat_id=source_chat_id, year=year)
+
+
+def _build_my_cards(db: Session, source_chat_id: int, user_id: int, year: int) -> list[str]:
+    if source_chat_id == 0:
+        return build_my_year_recap_cards_all_chats(db, user_id=user_id, year=year)
+    return build_my_year_recap_cards(db, chat_id=source_chat_id, user_id=user_id, year=year)
+
+
+async def _chat_recap_cards(
+    session_factory: sessionmaker, source_chat_id: int, year: int, member_id: int | None = None
+) -> list[str] | None:
+    """member_id: only build when that user is a member of source_chat_id (owner picking any chat)."""
+    return await _cached_cards(
+        ("chat", source_chat_id, year, member_id),
+        lambda: run_in_session(session_factory, _build_chat_cards, source_chat_id, year, member_id),
+    )
+
+
+async def _my_recap_cards(
+    cb: CallbackQuery,
+    session_factory: sessionmaker,
+    source_chat_id: int,
+    year: int,
+    allowed: Callable[[Session], bool] | None = None,
+) -> list[str] | None:
+    """allowed: access check run on every call, before the cache, so a cached list never skips it."""
+    user_id = cb.from_user.id
+    if allowed is not None and not await run_in_session(session_factory, allowed):
+        return None
+
+    async def _build() -> list[str]:
+        cards = await run_in_session(session_factory, _build_my_cards, source_chat_id, user_id, year)
+        if source_chat_id == 0:
+            cards = await _enrich_chat_titles(cards, cb)
+        return cards
+
+    return await _cached_cards(("my", source_chat_id, user_id, year), _build)
+
+
+async def _send_personal_recap_to_dm(
+    cb: CallbackQuery, session_factory: sessionmaker, source_chat_id: int, year: int
+) -> bool:
     if cb.from_user is None:
         return False
-    with db_session(_session_factory) as db:
-        cards = build_my_year_recap_cards(db, chat_id=source_chat_id, user_id=cb.from_user.id, year=year)
+    cards = await _my_recap_cards(cb, session_factory, source_chat_id, year)
     text = f"Карточка 1/{len(cards)}\n\n{cards[0]}"
     kb = recap_next_kb(source_chat_id, year, 1) if len(cards) > 1 else None
     try:
@@ -133,12 +177,10 @@ async def _send_personal_recap_to_dm(cb: CallbackQuery, source_chat_id: int, yea
         return False
 
 
-async def _send_personal_recap_all_chats_to_dm(cb: CallbackQuery, year: int) -> bool:
+async def _send_personal_recap_all_chats_to_dm(cb: CallbackQuery, session_factory: sessionmaker, year: int) -> bool:
     if cb.from_user is None:
         return False
-    with db_session(_session_factory) as db:
-        cards = build_my_year_recap_cards_all_chats(db, user_id=cb.from_user.id, year=year)
-    cards = await _enrich_chat_titles(cards, cb)
+    cards = await _my_recap_cards(cb, session_factory, 0, year)
     text = f"Карточка 1/{len(cards)}\n\n{cards[0]}"
     kb = recap_next_kb(0, year, 1) if len(cards) > 1 else None
     try:
@@ -148,39 +190,42 @@ async def _send_personal_recap_all_chats_to_dm(cb: CallbackQuery, year: int) ->
         return False
 
 
-async def _send_group_chat_recap_start(cb: CallbackQuery, source_chat_id: int, year: int) -> None:
-    with db_session(_session_factory) as db:
-        cards = build_chat_year_recap_cards(db, chat_id=source_chat_id, year=year)
+async def _send_group_chat_recap_start(
+    cb: CallbackQuery, session_factory: sessionmaker, source_chat_id: int, year: int
+) -> None:
+    cards = await _chat_recap_cards(session_factory, source_chat_id, year)
     text = f"Карточка 1/{len(cards)}\n\n{cards[0]}"
     kb = recap_chat_card_kb(source_chat_id=source_chat_id, year=year, next_index=1, has_next=len(cards) > 1)
     await cb.bot.send_message(chat_id=cb.message.chat.id, text=text, reply_markup=kb)
 
 
-async def _check_recap_window(cb: CallbackQuery) -> tuple[bool, int, object] | tuple[bool, None, object]:
-    from app.core.config import load_settings
-    from app.db.models import Chat
+def _chat_today(db: Session, chat_id: int) -> date:
+    return now_in_tz(get_chat_timezone(db, chat_id)).date()
 
-    settings = load_settings()
-    init_db(settings.database_url)
 
-    with db_session(_session_factory) as db:
-        source_chat = db.get(Chat, cb.message.chat.id)
-        tz = source_chat.timezone if source_chat else "Europe/Minsk"
-        today = now_in_tz(tz).date()
+async def _check_recap_window(
+    cb: CallbackQuery, settings: Settings, session_factory: sessionmaker
+) -> tuple[bool, int] | tuple[bool, None]:
+    # Outside recap season no timezone can land inside the window, so skip the chat lookup.
+    if not _is_owner(settings, cb.from_user.id) and not is_recap_season_near(datetime.now(timezone.utc).date()):
+        await cb.answer("Рекап доступен с 30 декабря по 3 января", show_alert=True)
+        return False, None
+
+    today = await run_in_session(session_factory, _chat_today, cb.message.chat.id)
 
     if not is_recap_available(today, cb.from_user.id, settings.bot_owner_id):
         await cb.answer("Рекап доступен с 30 декабря по 3 января", show_alert=True)
-        return False, None, settings
+        return False, None
 
-    return True, recap_target_year(today), settings
+    return True, recap_target_year(today)
 
 
 @router.callback_query(F.data == "stats:open:recap")
-async def recap_open(cb: CallbackQuery) -> None:
+async def recap_open(cb: CallbackQuery, settings: Settings, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.from_user is None:
         return
 
-    ok, year, settings = await _check_recap_window(cb)
+    ok, year = await _check_recap_window(cb, settings, session_factory)
     if not ok:
         return
 
@@ -196,7 +241,7 @@ async def recap_open(cb: CallbackQuery) -> None:
             await cb.answer()
             return
 
-        sent = await _send_personal_recap_all_chats_to_dm(cb, int(year))
+        sent = await _send_personal_recap_all_chats_to_dm(cb, session_factory, int(year))
         if not sent:
             await cb.answer("Открой личку с ботом и нажми /start, потом повтори", show_alert=True)
             return
@@ -208,11 +253,11 @@ async def recap_open(cb: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "recap:entry:menu")
-async def recap_entry_menu(cb: CallbackQuery) -> None:
+async def recap_entry_menu(cb: CallbackQuery, settings: Settings, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.from_user is None:
         return
 
-    ok, _, settings = await _check_recap_window(cb)
+    ok, _ = await _check_recap_window(cb, settings, session_factory)
     if not ok:
         return
 
@@ -228,11 +273,11 @@ async def recap_entry_menu(cb: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "recap:entry:chat")
-async def recap_entry_chat(cb: CallbackQuery) -> None:
+async def recap_entry_chat(cb: CallbackQuery, settings: Settings, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.from_user is None:
         return
 
-    ok, year, settings = await _check_recap_window(cb)
+    ok, year = await _check_recap_window(cb, settings, session_factory)
     if not ok:
         return
 
@@ -243,7 +288,7 @@ async def recap_entry_chat(cb: CallbackQuery) -> None:
         return
 
     if cb.message.chat.type != "private":
-        await _send_group_chat_recap_start(cb, cb.message.chat.id, int(year))
+        await _send_group_chat_recap_start(cb, session_factory, cb.message.chat.id, int(year))
         await cb.answer()
         return
 
@@ -251,8 +296,7 @@ async def recap_entry_chat(cb: CallbackQuery) -> None:
         await cb.answer("Открой рекап из группового чата", show_alert=True)
         return
 
-    with db_session(_session_factory) as db:
-        chat_ids = list_user_member_chat_ids(db, cb.from_user.id)
+    chat_ids = await run_in_session(session_factory, list_user_member_chat_ids, cb.from_user.id)
 
     if not chat_ids:
         await cb.answer("Нет чатов, где ты участник", show_alert=True)
@@ -267,11 +311,11 @@ async def recap_entry_chat(cb: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data == "recap:entry:personal")
-async def recap_entry_personal(cb: CallbackQuery) -> None:
+async def recap_entry_personal(cb: CallbackQuery, settings: Settings, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.from_user is None:
         return
 
-    ok, year, settings = await _check_recap_window(cb)
+    ok, year = await _check_recap_window(cb, settings, session_factory)
     if not ok:
         return
 
@@ -282,7 +326,7 @@ async def recap_entry_personal(cb: CallbackQuery) -> None:
         return
 
     if cb.message.chat.type != "private":
-        sent = await _send_personal_recap_to_dm(cb, cb.message.chat.id, int(year))
+        sent = await _send_personal_recap_to_dm(cb, session_factory, cb.message.chat.id, int(year))
         if not sent:
             await _notify_open_dm_in_group(cb)
             await cb.answer("Открой личку с ботом и нажми /start", show_alert=True)
@@ -291,15 +335,14 @@ async def recap_entry_personal(cb: CallbackQuery) -> None:
         return
 
     if not owner:
-        sent = await _send_personal_recap_all_chats_to_dm(cb, int(year))
+        sent = await _send_personal_recap_all_chats_to_dm(cb, session_factory, int(year))
         if not sent:
             await cb.answer("Открой личку с ботом и нажми /start, потом повтори", show_alert=True)
             return
         await cb.answer()
         return
 
-    with db_session(_session_factory) as db:
-        chat_ids = list_user_member_chat_ids(db, cb.from_user.id)
+    chat_ids = await run_in_session(session_factory, list_user_member_chat_ids, cb.from_user.id)
 
     if not chat_ids:
         await cb.answer("Нет чатов, где ты участник", show_alert=True)
@@ -315,16 +358,11 @@ async def recap_entry_personal(cb: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("recap:pick:"))
-async def recap_pick_chat(cb: CallbackQuery) -> None:
+async def recap_pick_chat(cb: CallbackQuery, settings: Settings, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.from_user is None or cb.data is None:
         return
 
-    from app.core.config import load_settings
-
-    settings = load_settings()
-    init_db(settings.database_url)
-
-    parts = cb.data.split(":")
+    parts = cb.data.split(":", 4)
     if len(parts) != 5:
         await cb.answer("Неактуально", show_alert=False)
         return
@@ -342,15 +380,11 @@ async def recap_pick_chat(cb: CallbackQuery) -> None:
         await cb.answer("Неактуально", show_alert=False)
         return
 
-    with db_session(_session_factory) as db:
-        allowed_chat_ids = list_user_member_chat_ids(db, cb.from_user.id)
-    if not (mode == "personal" and source_chat_id == 0) and source_chat_id not in allowed_chat_ids:
-        await cb.answer("Неактуально", show_alert=False)
-        return
-
     if mode == "chat":
-        with db_session(_session_factory) as db:
-            cards = build_chat_year_recap_cards(db, chat_id=source_chat_id, year=year)
+        cards = await _chat_recap_cards(session_factory, source_chat_id, year, member_id=cb.from_user.id)
+        if cards is None:
+            await cb.answer("Неактуально", show_alert=False)
+            return
         text = f"Карточка 1/{len(cards)}\n\n{cards[0]}"
         kb = recap_chat_card_kb(source_chat_id=source_chat_id, year=year, next_index=1, has_next=len(cards) > 1)
         await cb.bot.send_message(chat_id=cb.message.chat.id, text=text, reply_markup=kb)
@@ -358,10 +392,14 @@ async def recap_pick_chat(cb: CallbackQuery) -> None:
         return
 
     if mode == "personal":
+        if source_chat_id != 0:
+            if not await run_in_session(session_factory, is_user_chat_member, cb.from_user.id, source_chat_id):
+                await cb.answer("Неактуально", show_alert=False)
+                return
         if source_chat_id == 0:
-            sent = await _send_personal_recap_all_chats_to_dm(cb, year)
+            sent = await _send_personal_recap_all_chats_to_dm(cb, session_factory, year)
         else:
-            sent = await _send_personal_recap_to_dm(cb, source_chat_id, year)
+            sent = await _send_personal_recap_to_dm(cb, session_factory, source_chat_id, year)
         if not sent:
             await cb.answer("Открой личку с ботом и нажми /start, потом повтори", show_alert=True)
             return
@@ -372,15 +410,15 @@ async def recap_pick_chat(cb: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("recap:chatnext:"))
-async def recap_chat_next(cb: CallbackQuery) -> None:
+async def recap_chat_next(cb: CallbackQuery, settings: Settings, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.data is None or cb.from_user is None:
         return
 
-    ok, _, settings = await _check_recap_window(cb)
+    ok, _ = await _check_recap_window(cb, settings, session_factory)
     if not ok:
         return
 
-    parts = cb.data.split(":")
+    parts = cb.data.split(":", 4)
     if len(parts) != 5:
         await cb.answer()
         return
@@ -394,19 +432,17 @@ async def recap_chat_next(cb: CallbackQuery) -> None:
         return
 
     owner = _is_owner(settings, cb.from_user.id)
+    member_id = None
     if cb.message.chat.type == "private" and owner:
-        with db_session(_session_factory) as db:
-            allowed = list_user_member_chat_ids(db, cb.from_user.id)
-        if source_chat_id != 0 and source_chat_id not in allowed:
-            await cb.answer("Неактуально", show_alert=False)
-            return
-    else:
-        if cb.message.chat.id != source_chat_id:
-            await cb.answer("Неактуально", show_alert=False)
-            return
+        member_id = cb.from_user.id
+    elif cb.message.chat.id != source_chat_id:
+        await cb.answer("Неактуально", show_alert=False)
+        return
 
-    with db_session(_session_factory) as db:
-        cards = build_chat_year_recap_cards(db, chat_id=source_chat_id, year=year)
+    cards = await _chat_recap_cards(session_factory, source_chat_id, year, member_id=member_id)
+    if cards is None:
+        await cb.answer("Неактуально", show_alert=False)
+        return
 
     if idx < 0 or idx >= len(cards):
         await cb.answer("Рекап завершён", show_alert=False)
@@ -428,15 +464,15 @@ async def recap_chat_next(cb: CallbackQuery) -> None:
 
 
 @router.callback_query(F.data.startswith("recap:next:"))
-async def recap_next(cb: CallbackQuery) -> None:
+async def recap_next(cb: CallbackQuery, settings: Settings, session_factory: sessionmaker) -> None:
     if cb.message is None or cb.from_user is None or cb.data is None:
         return
 
-    ok, _, settings = await _check_recap_window(cb)
+    ok, _ = await _check_recap_window(cb, settings, session_factory)
     if not ok:
         return
 
-    parts = cb.data.split(":")
+    parts = cb.data.split(":", 4)
     if len(parts) != 5:
         await cb.answer()
         return
@@ -450,30 +486,19 @@ async def recap_next(cb: CallbackQuery) -> None:
         return
 
     owner = _is_owner(settings, cb.from_user.id)
+    user_id = cb.from_user.id
 
-    if cb.message.chat.type == "private" and owner:
-        with db_session(_session_factory) as db:
-            allowed = list_user_member_chat_ids(db, cb.from_user.id)
-        if source_chat_id != 0 and source_chat_id not in allowed:
-            await cb.answer("Неактуально", show_alert=False)
-            return
-    elif cb.message.chat.type == "private":
-        if source_chat_id == 0:
-            pass
+    allowed = None
+    if cb.message.chat.type == "private" and source_chat_id != 0:
+        if owner:
+            allowed = lambda db: is_user_chat_member(db, user_id, source_chat_id)  # noqa: E731
         else:
-            with db_session(_session_factory) as db:
-                allowed = list_user_recap_chat_ids(db, cb.from_user.id, year)
-            if source_chat_id != 0 and source_chat_id not in allowed:
-                await cb.answer("Неактуально", show_alert=False)
-                return
+            allowed = lambda db: has_user_recap_in_chat(db, user_id, source_chat_id, year)  # noqa: E731
 
-    with db_session(_session_factory) as db:
-        if source_chat_id == 0:
-            cards = build_my_year_recap_cards_all_chats(db, user_id=cb.from_user.id, year=year)
-        else:
-            cards = build_my_year_recap_cards(db, chat_id=source_chat_id, user_id=cb.from_user.id, year=year)
-    if source_chat_id == 0:
-        cards = await _enrich_chat_titles(cards, cb)
+    cards = await _my_recap_cards(cb, session_factory, source_chat_id, year, allowed)
+    if cards is None:
+        await cb.answer("Неактуально", show_alert=False)
+        return
 
     if idx < 0 or idx >= len(cards):
         await cb.answer("Рекап завершён", show_alert=False)
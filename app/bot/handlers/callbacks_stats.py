@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import logging
+from datetime import date
+from functools import lru_cache
+from typing import Awaitable, Callable
 
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import CallbackQuery
+from sqlalchemy.orm import sessionmaker
 
 from app.bot.keyboards.stats import (
     PERIOD_ALL,
@@ -17,10 +21,12 @@ from app.bot.keyboards.stats import (
     stats_local_kb,
     stats_root_kb,
 )
-from app.db.engine import make_engine, make_session_factory
-from app.db.session import db_session
+from app.core.config import Settings
+from app.core.ttl_cache import TTLCache
+from app.db.session import run_in_session
+from app.services.chat_title_service import fetch_chat_titles
 from app.services.recap_service import is_recap_available
-from app.services.repo_service import upsert_chat, upsert_user
+from app.services.repo_service import get_chat_timezone, upsert_chat, upsert_user
 from app.services.stats_service import (
     build_stats_text_chat,
     build_stats_text_global,
@@ -32,17 +38,14 @@ from app.services.time_service import now_in_tz
 logger = logging.getLogger(__name__)
 router = Router()
 
-_engine = None
-_session_factory = None
+STATS_UPSERT_TTL_SEC = 300
+# (chat_id, user_id) pairs whose chat/user upsert is skipped until the entry expires
+_recently_upserted: TTLCache[tuple[int, int], bool] = TTLCache(STATS_UPSERT_TTL_SEC, maxsize=10_000)
 
-
-def init_db(database_url: str) -> None:
-    global _engine, _session_factory
-    if _engine is None:
-        _engine = make_engine(database_url)
-        _session_factory = make_session_factory(_engine)
+_NOT_MODIFIED = "message is not modified"
 
 
+@lru_cache(maxsize=8)
 def _stats_root_text(show_recap: bool, is_owner_private: bool, is_private_chat: bool) -> str:
     text = (
         "📊 Статистика\n\n"
@@ -65,12 +68,17 @@ def _stats_root_text(show_recap: bool, is_owner_private: bool, is_private_chat:
     return text
 
 
-def _render(db, chat_id: int, user_id: int, scope: str) -> str:
-    from app.db.models import Chat
+def _chat_today(db, chat_id: int) -> date:
+    return now_in_tz(get_chat_timezone(db, chat_id)).date()
+
+
+def _upsert_chat_user(db, chat_id: int, user) -> None:
+    upsert_chat(db, chat_id)
+    upsert_user(db, user_id=user.id, username=user.username, first_name=user.first_name, last_name=user.last_name)
+
 
-    chat = db.get(Chat, chat_id)
-    tz = chat.timezone if chat else "Europe/Minsk"
-    today = now_in_tz(tz).date()
+def _render(db, chat_id: int, user_id: int, scope: str) -> str:
+    today = _chat_today(db, chat_id)
 
     if scope == SCOPE_MY:
         return build_stats_text_my(db, chat_id, user_id, today, PERIOD_ALL)
@@ -79,156 +87,144 @@ def _render(db, chat_id: int, user_id: int, scope: str) -> str:
     return build_stats_text_global(db, user_id, today, PERIOD_ALL)
 
 
-@router.callback_query(F.data.startswith("stats:"))
-async def stats_callbacks(cb: CallbackQuery) -> None:
-    if cb.message is None or cb.from_user is None:
+async def _open_scope(cb: CallbackQuery, scope: str, settings: Settings, session_factory: sessionmaker) -> None:
+    if scope not in (SCOPE_MY, SCOPE_CHAT, SCOPE_AMONG, SCOPE_GLOBAL):
+        await cb.answer()
         return
 
-    from app.core.config import load_settings
-    from app.db.models import Chat
+    if scope == SCOPE_AMONG:
+        text = await _render_among_chats(cb, session_factory)
+        await _edit(cb, text, stats_among_kb())
+        return
 
-    settings = load_settings()
-    init_db(settings.database_url)
+    text = await run_in_session(session_factory, _render, cb.message.chat.id, cb.from_user.id, scope)
+    if scope == SCOPE_GLOBAL:
+        await _edit(cb, text, stats_global_kb(is_private_chat=(cb.message.chat.type == "private")))
+    else:
+        await _edit(cb, text, stats_local_kb())
 
-    chat_id = cb.message.chat.id
-    user = cb.from_user
-    data = cb.data or ""
 
-    with db_session(_session_factory) as db:
-        upsert_chat(db, chat_id)
-        upsert_user(db, user_id=user.id, username=user.username, first_name=user.first_name, last_name=user.last_name)
+async def _open_global(cb: CallbackQuery, arg: str, settings: Settings, session_factory: sessionmaker) -> None:
+    if arg != "me":
+        await cb.answer()
+        return
+    text = await run_in_session(session_factory, _render, cb.message.chat.id, cb.from_user.id, SCOPE_GLOBAL)
+    await _edit(cb, text, stats_global_kb(is_private_chat=(cb.message.chat.type == "private")))
 
-        parts = data.split(":")
 
-        if len(parts) == 3 and parts[1] == "open":
-            scope = parts[2]
-            if scope not in (SCOPE_MY, SCOPE_CHAT, SCOPE_AMONG, SCOPE_GLOBAL):
-                await cb.answer()
-                return
+async def _back(cb: CallbackQuery, arg: str, settings: Settings, session_factory: sessionmaker) -> None:
+    if arg != "root":
+        await cb.answer()
+        return
+    user_id = cb.from_user.id
+    today = await run_in_session(session_factory, _chat_today, cb.message.chat.id)
+    show_recap = is_recap_available(today, user_id, settings.bot_owner_id)
+    is_owner_private = settings.bot_owner_id is not None and user_id == settings.bot_owner_id and cb.message.chat.type == "private"
+    if settings.bot_owner_id is not None and user_id == settings.bot_owner_id:
+        show_recap = cb.message.chat.type == "private"
+    text = _stats_root_text(
+        show_recap=show_recap,
+        is_owner_private=is_owner_private,
+        is_private_chat=(cb.message.chat.type == "private"),
+    )
+    await _edit(
+        cb,
+        text,
+        stats_root_kb(show_recap=show_recap, is_private_chat=(cb.message.chat.type == "private")),
+    )
 
-            if scope == SCOPE_AMONG:
-                text = await _render_among_chats(cb, db)
-                await _edit(cb, text, stats_among_kb())
-                return
 
-            if scope == SCOPE_GLOBAL:
-                text = _render(db, chat_id, user.id, scope)
-                await _edit(cb, text, stats_global_kb(is_private_chat=(cb.message.chat.type == "private")))
-                return
+# stats:<action>:<arg> -> handler(cb, arg, settings, session_factory)
+_STATS_ACTIONS: dict[str, Callable[[CallbackQuery, str, Settings, sessionmaker], Awaitable[None]]] = {
+    "open": _open_scope,
+    "global": _open_global,
+    "back": _back,
+}
 
-            text = _render(db, chat_id, user.id, scope)
-            await _edit(cb, text, stats_local_kb())
-            return
 
-        if len(parts) == 3 and parts[1] == "global" and parts[2] == "me":
-            text = _render(db, chat_id, user.id, SCOPE_GLOBAL)
-            await _edit(cb, text, stats_global_kb(is_private_chat=(cb.message.chat.type == "private")))
-            return
+@router.callback_query(F.data.startswith("stats:"))
+async def stats_callbacks(cb: CallbackQuery, settings: Settings, session_factory: sessionmaker) -> None:
+    if cb.message is None or cb.from_user is None:
+        return
 
-        if len(parts) == 3 and parts[1] == "back" and parts[2] == "root":
-            chat = db.get(Chat, chat_id)
-            tz = chat.timezone if chat else "Europe/Minsk"
-            today = now_in_tz(tz).date()
-            show_recap = is_recap_available(today, user.id, settings.bot_owner_id)
-            is_owner_private = settings.bot_owner_id is not None and user.id == settings.bot_owner_id and cb.message.chat.type == "private"
-            if settings.bot_owner_id is not None and user.id == settings.bot_owner_id:
-                show_recap = cb.message.chat.type == "private"
-            text = _stats_root_text(
-                show_recap=show_recap,
-                is_owner_private=is_owner_private,
-                is_private_chat=(cb.message.chat.type == "private"),
-            )
-            await _edit(
-                cb,
-                text,
-                stats_root_kb(show_recap=show_recap, is_private_chat=(cb.message.chat.type == "private")),
-            )
-            return
+    chat_id = cb.message.chat.id
+    user = cb.from_user
+    data = cb.data or ""
 
-    await cb.answer()
+    seen_key = (chat_id, user.id)
+    if not _recently_upserted.get(seen_key):
+        await run_in_session(session_factory, _upsert_chat_user, chat_id, user)
+        _recently_upserted.set(seen_key, True)
 
+    parts = data.split(":", 2)
+    action = _STATS_ACTIONS.get(parts[1]) if len(parts) == 3 else None
+    if action is None:
+        await cb.answer()
+        return
 
-async def _render_among_chats(cb: CallbackQuery, db) -> str:
-    from app.db.models import Chat
+    # Report queries run on a worker thread so they don't stall other updates.
+    await action(cb, parts[2], settings, session_factory)
 
-    cur_chat = db.get(Chat, cb.message.chat.id)
-    tz = cur_chat.timezone if cur_chat else "Europe/Minsk"
-    today = now_in_tz(tz).date()
-    snap = collect_among_chats_snapshot(db, today)
 
-    ids = set()
-    ids.update(chat_id for chat_id, _ in snap["top_total"])
-    ids.update(chat_id for chat_id, _, _, _ in snap["top_avg"])
-    ids.update(chat_id for chat_id, _ in snap["top_streak"])
-    if snap["record_day"] is not None:
-        ids.add(snap["record_day"][0])
-    if snap.get("most_liquid") is not None:
-        ids.add(snap["most_liquid"][0])
-    if snap.get("most_dry") is not None:
-        ids.add(snap["most_dry"][0])
-
-    names: dict[int, str] = {}
-    for cid in ids:
-        try:
-            chat_obj = await cb.bot.get_chat(cid)
-            title = getattr(chat_obj, "title", None) or getattr(chat_obj, "full_name", None)
-            names[cid] = (title or f"Чат {cid}").strip()
-        except Exception:
-            names[cid] = f"Чат {cid}"
+def _among_chats_snapshot(db, chat_id: int) -> dict:
+    return collect_among_chats_snapshot(db, _chat_today(db, chat_id))
+
+
+async def _render_among_chats(cb: CallbackQuery, session_factory: sessionmaker) -> str:
+    snap = await run_in_session(session_factory, _among_chats_snapshot, cb.message.chat.id)
+
+    ids = {row[0] for key in ("top_total", "top_avg", "top_streak") for row in snap[key]}
+    ids.update(row[0] for row in (snap["record_day"], snap.get("most_liquid"), snap.get("most_dry")) if row is not None)
+
+    names = {cid: (title or f"Чат {cid}").strip() for cid, title in (await fetch_chat_titles(cb.bot, ids)).items()}
 
     def chat_name(cid: int) -> str:
         return names.get(cid, f"Чат {cid}")
 
-    lines = [
-        "🏟️ Среди чатов",
-        "Период: за всё время",
-        "",
-        "Топ-5 по общему количеству 💩:",
-    ]
+    lines = ["🏟️ Среди чатов", "Период: за всё время", "", "Топ-5 по общему количеству 💩:"]
+    add = lines.append
+    no_data = "- пока нет данных"
 
-    if snap["top_total"]:
-        for idx, (cid, total) in enumerate(snap["top_total"], start=1):
-            lines.append(f"- {idx}) {chat_name(cid)} — 💩({total})")
-    else:
-        lines.append("- пока нет данных")
+    for idx, (cid, total) in enumerate(snap["top_total"], start=1):
+        add(f"- {idx}) {chat_name(cid)} — 💩({total})")
+    if not snap["top_total"]:
+        add(no_data)
 
-    lines.extend(["", "Топ-5 по среднему на участника:"])
-    if snap["top_avg"]:
-        for idx, (cid, avg, total, participants) in enumerate(snap["top_avg"], start=1):
-            lines.append(f"- {idx}) {chat_name(cid)} — {avg:.2f} (💩({total}), участников: {participants})")
-    else:
-        lines.append("- пока нет данных")
+    add("\nТоп-5 по среднему на участника:")
+    for idx, (cid, avg, total, participants) in enumerate(snap["top_avg"], start=1):
+        add(f"- {idx}) {chat_name(cid)} — {avg:.2f} (💩({total}), участников: {participants})")
+    if not snap["top_avg"]:
+        add(no_data)
 
-    lines.extend(["", "Топ-5 по лучшему стрику чата:"])
-    if snap["top_streak"]:
-        for idx, (cid, days) in enumerate(snap["top_streak"], start=1):
-            lines.append(f"- {idx}) {chat_name(cid)} — {days} дн.")
-    else:
-        lines.append("- пока нет данных")
+    add("\nТоп-5 по лучшему стрику чата:")
+    for idx, (cid, days) in enumerate(snap["top_streak"], start=1):
+        add(f"- {idx}) {chat_name(cid)} — {days} дн.")
+    if not snap["top_streak"]:
+        add(no_data)
 
-    lines.extend(["", "Рекорд дня:"])
+    add("\nРекорд дня:")
     if snap["record_day"] is not None:
         cid, d, poops = snap["record_day"]
-        lines.append(f"- {chat_name(cid)} — {d.strftime('%d.%m.%y')} (💩({poops}))")
+        add(f"- {chat_name(cid)} — {d.strftime('%d.%m.%y')} (💩({poops}))")
     else:
-        lines.append("- пока нет данных")
+        add(no_data)
 
-    lines.extend(["", "Бристоль-экстрим:"])
+    add("\nБристоль-экстрим:")
     most_liquid = snap.get("most_liquid")
     most_dry = snap.get("most_dry")
     min_samples = int(snap.get("min_bristol_samples", 10))
     if most_liquid is None:
-        lines.append(f"- 🥤 Самый жидкий чат: недостаточно данных (нужно минимум {min_samples} оценок)")
+        add(f"- 🥤 Самый жидкий чат: недостаточно данных (нужно минимум {min_samples} оценок)")
     else:
         cid, share, _liquid_n, total_n = most_liquid
         pct = int(round(float(share) * 100))
-        lines.append(f"- 🥤 Самый жидкий чат: {chat_name(cid)} — {pct}% (6–7), оценок: {total_n}")
+        add(f"- 🥤 Самый жидкий чат: {chat_name(cid)} — {pct}% (6–7), оценок: {total_n}")
     if most_dry is None:
-        lines.append(f"- 🥨 Самый сухой чат: недостаточно данных (нужно минимум {min_samples} оценок)")
+        add(f"- 🥨 Самый сухой чат: недостаточно данных (нужно минимум {min_samples} оценок)")
     else:
         cid, share, _dry_n, total_n = most_dry
         pct = int(round(float(share) * 100))
-        lines.append(f"- 🥨 Самый сухой чат: {chat_name(cid)} — {pct}% (1–2), оценок: {total_n}")
+        add(f"- 🥨 Самый сухой чат: {chat_name(cid)} — {pct}% (1–2), оценок: {total_n}")
 
     return "\n".join(lines)
 
@@ -238,7 +234,7 @@ async def _edit(cb: CallbackQuery, text: str, kb) -> None:
         await cb.message.edit_text(text, reply_markup=kb)
         await cb.answer()
     except TelegramBadRequest as e:
-        if "message is not modified" in str(e).lower():
+        if _NOT_MODIFIED in e.message.lower():
             await cb.answer()
             return
         logger.exception("Stats edit failed: %s", e)
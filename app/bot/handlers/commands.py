@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Awaitable, Callable
+
 from aiogram import Router
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.types import InlineKeyboardMarkup, Message, User
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.bot.keyboards.help import help_root_kb
 from app.bot.keyboards.q1 import q1_keyboard
 from app.bot.keyboards.recap import recap_announce_kb
 from app.bot.keyboards.stats import stats_root_kb
-from app.db.engine import make_engine, make_session_factory
-from app.db.session import db_session
+from app.core.config import Settings
+from app.db.session import db_session, run_in_session
 from app.services.command_message_service import (
     get_any_command_message_id,
     get_command_message_id,
@@ -20,8 +27,7 @@ from app.services.q1_service import render_q1
 from app.services.q2_q3_service import ensure_q2_q3_exist
 from app.services.recap_service import is_recap_available
 from app.services.repo_service import (
-    get_or_create_session,
-    get_session_message_id,
+    get_or_create_session_with_message,
     set_session_message_id,
     upsert_chat,
     upsert_user,
@@ -30,17 +36,19 @@ from app.services.time_service import get_session_window, now_in_tz
 
 router = Router()
 
-_engine = None
-_session_factory = None
-
-
-def init_db(database_url: str) -> None:
-    global _engine, _session_factory
-    if _engine is None:
-        _engine = make_engine(database_url)
-        _session_factory = make_session_factory(_engine)
+# Telegram errors meaning the remembered menu message is gone and a new one should be sent.
+_STALE_MENU_ERR_RE = re.compile(
+    r"message to edit not found|message to be replied not found|replied message not found|message_id_invalid",
+    re.IGNORECASE,
+)
+_NOT_MODIFIED_RE = re.compile(r"message is not modified", re.IGNORECASE)
+HELP_POINTER_TEXT = "Меню помощи выше 👆"
+STATS_POINTER_TEXT = "Твоя статистика выше 👆"
+# (chat_id, user_id, command) -> resolved once the running /help or /stats for that key finishes
+_inflight_commands: dict[tuple[int, int, str], asyncio.Future[None]] = {}
 
 
+@lru_cache(maxsize=64)
 def _help_root_text(tz_name: str) -> str:
     return (
         "ℹ️ Помощь\n\n"
@@ -60,6 +68,7 @@ def _help_root_text(tz_name: str) -> str:
     )
 
 
+@lru_cache(maxsize=8)
 def _stats_root_text(show_recap: bool, is_owner_private: bool, is_private_chat: bool) -> str:
     text = (
         "📊 Статистика\n\n"
@@ -82,31 +91,84 @@ def _stats_root_text(show_recap: bool, is_owner_private: bool, is_private_chat:
     return text
 
 
-@router.message(Command("start"))
-async def start_cmd(message: Message) -> None:
-    if message.chat is None or message.from_user is None:
+async def _single_flight(key: tuple[int, int, str], run: Callable[[], Awaitable[None]]) -> None:
+    """A double-tapped command waits for the one already running instead of sending a second menu."""
+    pending = _inflight_commands.get(key)
+    if pending is not None:
+        await asyncio.shield(pending)
         return
 
-    from app.core.config import load_settings
+    done = asyncio.get_running_loop().create_future()
+    _inflight_commands[key] = done
+    try:
+        await run()
+    finally:
+        del _inflight_commands[key]
+        done.set_result(None)
+
+
+async def _edit_or_send_menu(
+    message: Message,
+    existing_mid: int | None,
+    text: str,
+    kb: InlineKeyboardMarkup,
+    pointer_text: str,
+) -> Message | None:
+    """Refresh the remembered menu and point at it; returns the new menu message if one had to be sent."""
+    if existing_mid:
+        try:
+            # Always edit: callbacks may have moved the remembered menu into a submenu since it was sent.
+            await message.bot.edit_message_text(
+                chat_id=message.chat.id,
+                message_id=existing_mid,
+                text=text,
+                reply_markup=kb,
+            )
+            await message.answer(pointer_text, reply_to_message_id=existing_mid)
+            return None
+        except TelegramBadRequest as e:
+            if _NOT_MODIFIED_RE.search(e.message):
+                await message.answer(pointer_text, reply_to_message_id=existing_mid)
+                return None
+            if not _STALE_MENU_ERR_RE.search(e.message):
+                raise
+
+    return await message.answer(text, reply_markup=kb)
+
 
-    settings = load_settings()
-    init_db(settings.database_url)
+def _help_context(db: Session, chat_id: int) -> tuple[str, date, int | None]:
+    chat = upsert_chat(db, chat_id=chat_id)
+    session_date = get_session_window(chat.timezone).session_date
+    return chat.timezone, session_date, get_any_command_message_id(db, chat_id, "help", session_date)
+
+
+def _stats_context(db: Session, chat_id: int, user: User) -> tuple[date, int | None]:
+    chat = upsert_chat(db, chat_id=chat_id)
+    upsert_user(db, user_id=user.id, username=user.username, first_name=user.first_name, last_name=user.last_name)
+    today = now_in_tz(chat.timezone).date()
+    return today, get_command_message_id(db, chat_id, user.id, "stats", today)
+
+
+@router.message(Command("start"))
+async def start_cmd(message: Message, session_factory: sessionmaker) -> None:
+    if message.chat is None or message.from_user is None:
+        return
 
     chat_id = message.chat.id
     user = message.from_user
 
-    with db_session(_session_factory) as db:
+    with db_session(session_factory) as db:
         chat = upsert_chat(db, chat_id=chat_id)
 
-        window = get_session_window(chat.timezone)
+        now_local = now_in_tz(chat.timezone)
+        window = get_session_window(chat.timezone, now=now_local)
         if window.is_blocked_window:
             await message.answer("Новая сессия начнется в 00:05")
             return
 
         upsert_user(db, user_id=user.id, username=user.username, first_name=user.first_name, last_name=user.last_name)
 
-        sess = get_or_create_session(db, chat_id=chat_id, session_date=window.session_date)
-        q1_msg_id = get_session_message_id(db, sess.session_id, "Q1")
+        sess, q1_msg_id = get_or_create_session_with_message(db, chat_id, window.session_date, "Q1")
 
         if q1_msg_id:
             try:
@@ -117,8 +179,7 @@ async def start_cmd(message: Message) -> None:
                 if "message to be replied not found" not in str(e).lower():
                     raise
 
-        text = render_q1(db, chat_id=chat_id, session_id=sess.session_id, session_date=window.session_date)
-        has_any_members = "Участники:" in text
+        q1 = render_q1(db, chat_id=chat_id, session_id=sess.session_id, session_date=window.session_date)
 
         if window.session_date.month == 12 and window.session_date.day == 30:
             sent_recap_mid = get_command_message_id(db, chat_id, 0, "recap_announce", window.session_date)
@@ -132,126 +193,82 @@ async def start_cmd(message: Message) -> None:
                 recap_sent = await message.answer(recap_text, reply_markup=recap_announce_kb())
                 set_command_message_id(db, chat_id, 0, "recap_announce", window.session_date, recap_sent.message_id)
 
-        sent = await message.answer(text, reply_markup=q1_keyboard(has_any_members))
+        sent = await message.answer(q1.text, reply_markup=q1_keyboard(q1.has_members))
         set_session_message_id(db, sess.session_id, "Q1", sent.message_id)
         await ensure_q2_q3_exist(message.bot, db, chat_id, sess.session_id)
 
 
 @router.message(Command("help"))
-async def help_cmd(message: Message) -> None:
+async def help_cmd(message: Message, session_factory: sessionmaker) -> None:
     if message.chat is None or message.from_user is None:
         return
+    await _single_flight(
+        (message.chat.id, message.from_user.id, "help"),
+        lambda: _send_help(message, session_factory),
+    )
 
-    from app.core.config import load_settings
-
-    settings = load_settings()
-    init_db(settings.database_url)
 
+async def _send_help(message: Message, session_factory: sessionmaker) -> None:
     chat_id = message.chat.id
     user = message.from_user
 
-    with db_session(_session_factory) as db:
-        chat = upsert_chat(db, chat_id=chat_id)
-        window = get_session_window(chat.timezone)
-        session_date = window.session_date
-        existing_mid = get_any_command_message_id(db, chat_id, "help", session_date)
-        is_private_chat = message.chat.type == "private"
-        root_text = _help_root_text(chat.timezone)
-
-    if existing_mid and not is_private_chat:
-        try:
-            await message.bot.edit_message_text(
-                chat_id=chat_id,
-                message_id=existing_mid,
-                text=root_text,
-                reply_markup=help_root_kb(user.id),
-            )
-            await message.answer("Меню помощи выше 👆", reply_to_message_id=existing_mid)
-            return
-        except TelegramBadRequest as e:
-            err = str(e).lower()
-            if "message is not modified" in err:
-                await message.answer("Меню помощи выше 👆", reply_to_message_id=existing_mid)
-                return
-            if all(
-                x not in err
-                for x in (
-                    "message to edit not found",
-                    "message to be replied not found",
-                    "replied message not found",
-                    "message_id_invalid",
-                )
-            ):
-                raise
-
-    sent = await message.answer(root_text, reply_markup=help_root_kb(user.id))
+    is_private_chat = chat_id > 0  # private chats have positive ids, groups negative
+    tz_name, session_date, existing_mid = await run_in_session(session_factory, _help_context, chat_id)
+    root_text = _help_root_text(tz_name)
+    kb = help_root_kb(user.id)
+
+    sent = await _edit_or_send_menu(
+        message,
+        existing_mid=None if is_private_chat else existing_mid,
+        text=root_text,
+        kb=kb,
+        pointer_text=HELP_POINTER_TEXT,
+    )
+    if sent is None:
+        return
 
-    with db_session(_session_factory) as db:
-        chat = upsert_chat(db, chat_id=chat_id)
-        window = get_session_window(chat.timezone)
-        set_command_message_id(db, chat_id, user.id, "help", window.session_date, sent.message_id)
+    # Stored before _single_flight releases, so a repeated /help finds this menu instead of sending another.
+    await run_in_session(
+        session_factory, set_command_message_id, chat_id, user.id, "help", session_date, sent.message_id
+    )
 
 
 @router.message(Command("stats"))
-async def stats_cmd(message: Message) -> None:
+async def stats_cmd(message: Message, settings: Settings, session_factory: sessionmaker) -> None:
     if message.chat is None or message.from_user is None:
         return
+    await _single_flight(
+        (message.chat.id, message.from_user.id, "stats"),
+        lambda: _send_stats(message, settings, session_factory),
+    )
 
-    from app.core.config import load_settings
-
-    settings = load_settings()
-    init_db(settings.database_url)
 
+async def _send_stats(message: Message, settings: Settings, session_factory: sessionmaker) -> None:
     chat_id = message.chat.id
     user = message.from_user
 
-    with db_session(_session_factory) as db:
-        chat = upsert_chat(db, chat_id=chat_id)
-        upsert_user(db, user_id=user.id, username=user.username, first_name=user.first_name, last_name=user.last_name)
-
-        today = now_in_tz(chat.timezone).date()
-        existing_mid = get_command_message_id(db, chat_id, user.id, "stats", today)
-        is_private_chat = message.chat.type == "private"
-        show_recap = is_recap_available(today, user.id, settings.bot_owner_id)
-        is_owner_private = settings.bot_owner_id is not None and user.id == settings.bot_owner_id and is_private_chat
-        if settings.bot_owner_id is not None and user.id == settings.bot_owner_id:
-            show_recap = is_private_chat
+    today, existing_mid = await run_in_session(session_factory, _stats_context, chat_id, user)
+    is_private_chat = chat_id > 0
+    show_recap = is_recap_available(today, user.id, settings.bot_owner_id)
+    is_owner_private = settings.bot_owner_id is not None and user.id == settings.bot_owner_id and is_private_chat
+    if settings.bot_owner_id is not None and user.id == settings.bot_owner_id:
+        show_recap = is_private_chat
 
     text = _stats_root_text(
         show_recap=show_recap,
         is_owner_private=is_owner_private,
         is_private_chat=is_private_chat,
     )
+    kb = stats_root_kb(show_recap=show_recap, is_private_chat=is_private_chat)
+
+    sent = await _edit_or_send_menu(
+        message,
+        existing_mid=None if is_private_chat else existing_mid,
+        text=text,
+        kb=kb,
+        pointer_text=STATS_POINTER_TEXT,
+    )
+    if sent is None:
+        return
 
-    if existing_mid and not is_private_chat:
-        try:
-            await message.bot.edit_message_text(
-                chat_id=chat_id,
-                message_id=existing_mid,
-                text=text,
-                reply_markup=stats_root_kb(show_recap=show_recap, is_private_chat=is_private_chat),
-            )
-            await message.answer("Твоя статистика выше 👆", reply_to_message_id=existing_mid)
-            return
-        except TelegramBadRequest as e:
-            err = str(e).lower()
-            if "message is not modified" in err:
-                await message.answer("Твоя статистика выше 👆", reply_to_message_id=existing_mid)
-                return
-            if all(
-                x not in err
-                for x in (
-                    "message to edit not found",
-                    "message to be replied not found",
-                    "replied message not found",
-                    "message_id_invalid",
-                )
-            ):
-                raise
-
-    sent = await message.answer(text, reply_markup=stats_root_kb(show_recap=show_recap, is_private_chat=is_private_chat))
-
-    with db_session(_session_factory) as db:
-        chat = upsert_chat(db, chat_id=chat_id)
-        today = now_in_tz(chat.timezone).date()
-        set_command_message_id(db, chat_id, user.id, "stats", today, sent.message_id)
+    await run_in_session(session_factory, set_command_message_id, chat_id, user.id, "stats", today, sent.message_id)
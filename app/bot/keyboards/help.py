@@ -1,86 +1,105 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+POST_TIME_CHOICES: tuple[tuple[int, str], ...] = (
+    (10, "🌅 Утро (10:00)"),
+    (14, "🍽️ Обед (14:00)"),
+    (19, "🌙 Вечер (19:00)"),
+)
 
 
 def _mark(label: str, active: bool) -> str:
     return f"• {label}" if active else label
 
 
+@lru_cache(maxsize=4096)
 def help_root_kb(owner_id: int) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="⚙️ Настройки", callback_data=f"help:settings:{owner_id}"))
-    kb.row(InlineKeyboardButton(text="🤖 О боте", callback_data=f"help:about:{owner_id}"))
-    return kb.as_markup()
+    sid = str(owner_id)
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="⚙️ Настройки", callback_data="help:settings:" + sid)],
+            [InlineKeyboardButton(text="🤖 О боте", callback_data="help:about:" + sid)],
+        ]
+    )
 
 
+@lru_cache(maxsize=4096)
 def help_settings_kb(owner_id: int, is_private_chat: bool = False) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="🗑️ Удалить меня", callback_data=f"help:delete_me:{owner_id}"))
+    sid = str(owner_id)
+    rows = [[InlineKeyboardButton(text="🗑️ Удалить меня", callback_data="help:delete_me:" + sid)]]
     if not is_private_chat:
-        kb.row(InlineKeyboardButton(text="🧹 Удалить меня из этого чата", callback_data=f"help:delete_me_chat:{owner_id}"))
-        kb.row(InlineKeyboardButton(text="👁️ Видимость чата в рейтингах", callback_data=f"help:global_vis:{owner_id}"))
-    kb.row(InlineKeyboardButton(text="🔔 Уведомления", callback_data=f"help:notifications:{owner_id}"))
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"help:back:{owner_id}"))
-    return kb.as_markup()
+        rows.append([InlineKeyboardButton(text="🧹 Удалить меня из этого чата", callback_data="help:delete_me_chat:" + sid)])
+        rows.append([InlineKeyboardButton(text="👁️ Видимость чата в рейтингах", callback_data="help:global_vis:" + sid)])
+    rows.append([InlineKeyboardButton(text="🔔 Уведомления", callback_data="help:notifications:" + sid)])
+    rows.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="help:back:" + sid)])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=4096)
 def help_notifications_kb(
     owner_id: int,
     current_hour: int | None = None,
     notifications_enabled: bool = True,
 ) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(
-        InlineKeyboardButton(
-            text="🔔 Уведомления: Вкл" if notifications_enabled else "🔕 Уведомления: Выкл",
-            callback_data=f"help:notifications_toggle:{owner_id}",
-        )
-    )
-    kb.row(
-        InlineKeyboardButton(
-            text=_mark("🌅 Утро (10:00)", current_hour == 10),
-            callback_data=f"help:time:10:{owner_id}",
-        )
-    )
-    kb.row(
-        InlineKeyboardButton(
-            text=_mark("🍽️ Обед (14:00)", current_hour == 14),
-            callback_data=f"help:time:14:{owner_id}",
-        )
-    )
-    kb.row(
-        InlineKeyboardButton(
-            text=_mark("🌙 Вечер (19:00)", current_hour == 19),
-            callback_data=f"help:time:19:{owner_id}",
+    sid = str(owner_id)
+    rows = [
+        [
+            InlineKeyboardButton(
+                text="🔔 Уведомления: Вкл" if notifications_enabled else "🔕 Уведомления: Выкл",
+                callback_data="help:notifications_toggle:" + sid,
+            )
+        ]
+    ]
+    for hour, label in POST_TIME_CHOICES:
+        rows.append(
+            [
+                InlineKeyboardButton(
+                    text=_mark(label, current_hour == hour),
+                    callback_data=f"help:time:{hour}:{sid}",
+                )
+            ]
         )
-    )
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"help:settings:{owner_id}"))
-    return kb.as_markup()
+    rows.append([InlineKeyboardButton(text="⬅️ Назад", callback_data="help:settings:" + sid)])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=4096)
 def help_delete_confirm_kb(owner_id: int) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"help:delete_confirm_db:{owner_id}"))
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"help:settings:{owner_id}"))
-    return kb.as_markup()
+    sid = str(owner_id)
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="✅ Подтвердить", callback_data="help:delete_confirm_db:" + sid)],
+            [InlineKeyboardButton(text="⬅️ Назад", callback_data="help:settings:" + sid)],
+        ]
+    )
 
 
+@lru_cache(maxsize=4096)
 def help_delete_chat_confirm_kb(owner_id: int) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"help:delete_confirm_chat:{owner_id}"))
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"help:settings:{owner_id}"))
-    return kb.as_markup()
+    sid = str(owner_id)
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="✅ Подтвердить", callback_data="help:delete_confirm_chat:" + sid)],
+            [InlineKeyboardButton(text="⬅️ Назад", callback_data="help:settings:" + sid)],
+        ]
+    )
 
 
+@lru_cache(maxsize=4096)
 def help_global_visibility_kb(owner_id: int, enabled: bool) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(
-        InlineKeyboardButton(
-            text="👁️ Видимость в рейтингах: Вкл" if enabled else "🙈 Видимость в рейтингах: Выкл",
-            callback_data=f"help:global_vis_toggle:{owner_id}",
-        )
+    sid = str(owner_id)
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="👁️ Видимость в рейтингах: Вкл" if enabled else "🙈 Видимость в рейтингах: Выкл",
+                    callback_data="help:global_vis_toggle:" + sid,
+                )
+            ],
+            [InlineKeyboardButton(text="⬅️ Назад", callback_data="help:settings:" + sid)],
+        ]
     )
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"help:settings:{owner_id}"))
-    return kb.as_markup()
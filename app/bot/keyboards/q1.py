@@ -1,18 +1,18 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+_BTN_MINUS = InlineKeyboardButton(text="-💩", callback_data="q1:minus")
+_BTN_PLUS = InlineKeyboardButton(text="+💩", callback_data="q1:plus")
 
-def q1_keyboard(has_any_members: bool, show_remind: bool = True) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
 
+@lru_cache(maxsize=None)
+def q1_keyboard(has_any_members: bool) -> InlineKeyboardMarkup:
     if has_any_members:
-        kb.row(
-            InlineKeyboardButton(text="-💩", callback_data="q1:minus"),
-            InlineKeyboardButton(text="+💩", callback_data="q1:plus"),
-        )
+        row = [_BTN_MINUS, _BTN_PLUS]
     else:
-        kb.row(InlineKeyboardButton(text="+💩", callback_data="q1:plus"))
+        row = [_BTN_PLUS]
 
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[row])
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
 BRISTOL_CHOICES: list[tuple[str, str]] = [
@@ -16,16 +17,18 @@ def _choice_label(text: str, selected: bool) -> str:
     return text
 
 
+@lru_cache(maxsize=None)
 def q2_keyboard(
     selected_choice: str | None = None,
 ) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    for choice, text in BRISTOL_CHOICES:
-        kb.row(
-            InlineKeyboardButton(
-                text=_choice_label(text, selected_choice == choice),
-                callback_data=f"q2:{choice}",
-            )
-        )
-
-    return kb.as_markup()
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=_choice_label(text, selected_choice == choice),
+                    callback_data=f"q2:{choice}",
+                )
+            ]
+            for choice, text in BRISTOL_CHOICES
+        ]
+    )
@@ -1,54 +1,67 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+_BTN_BACK_TO_STATS = InlineKeyboardButton(text="⬅️ Назад", callback_data="stats:back:root")
+_BTN_BACK_TO_MENU = InlineKeyboardButton(text="⬅️ К выбору", callback_data="recap:entry:menu")
 
 
 def recap_next_kb(source_chat_id: int, year: int, next_index: int) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(
-        InlineKeyboardButton(
-            text="Следующая",
-            callback_data=f"recap:next:{source_chat_id}:{year}:{next_index}",
-        )
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="Следующая",
+                    callback_data=f"recap:next:{source_chat_id}:{year}:{next_index}",
+                )
+            ]
+        ]
     )
-    return kb.as_markup()
 
 
 def recap_chat_card_kb(source_chat_id: int, year: int, next_index: int, has_next: bool) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
+    rows = []
     if has_next:
-        kb.row(
-            InlineKeyboardButton(
-                text="Следующая",
-                callback_data=f"recap:chatnext:{source_chat_id}:{year}:{next_index}",
-            )
+        rows.append(
+            [
+                InlineKeyboardButton(
+                    text="Следующая",
+                    callback_data=f"recap:chatnext:{source_chat_id}:{year}:{next_index}",
+                )
+            ]
         )
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=None)
 def recap_announce_kb() -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="🎉 Рекап года", callback_data="stats:open:recap"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[InlineKeyboardButton(text="🎉 Рекап года", callback_data="stats:open:recap")]]
+    )
 
 
+@lru_cache(maxsize=None)
 def recap_entry_kb() -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="📊 Рекап чата", callback_data="recap:entry:chat"))
-    kb.row(InlineKeyboardButton(text="🎉 Личный рекап", callback_data="recap:entry:personal"))
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data="stats:back:root"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [InlineKeyboardButton(text="📊 Рекап чата", callback_data="recap:entry:chat")],
+            [InlineKeyboardButton(text="🎉 Личный рекап", callback_data="recap:entry:personal")],
+            [_BTN_BACK_TO_STATS],
+        ]
+    )
 
 
 def recap_chat_pick_mode_kb(year: int, mode: str, chat_options: list[tuple[int, str]]) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    for chat_id, title in chat_options:
-        kb.row(
+    rows = [
+        [
             InlineKeyboardButton(
                 text=title[:48],
                 callback_data=f"recap:pick:{mode}:{chat_id}:{year}",
             )
-        )
-    kb.row(InlineKeyboardButton(text="⬅️ К выбору", callback_data="recap:entry:menu"))
-    return kb.as_markup()
+        ]
+        for chat_id, title in chat_options
+    ]
+    rows.append([_BTN_BACK_TO_MENU])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
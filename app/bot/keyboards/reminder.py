@@ -1,10 +1,10 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 
+@lru_cache(maxsize=None)
 def reminder_keyboard(callback_data: str = "q1:plus_reminder") -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="➕💩", callback_data=callback_data))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="➕💩", callback_data=callback_data)]])
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 SCOPE_MY = "my"
 SCOPE_CHAT = "chat"
@@ -15,36 +16,41 @@ PERIOD_MONTH = "month"
 PERIOD_YEAR = "year"
 PERIOD_ALL = "all"
 
+# Static buttons are shared by every markup that shows them; aiogram only serializes them.
+_BTN_BACK = InlineKeyboardButton(text="⬅️ Назад", callback_data="stats:back:root")
+
 
+@lru_cache(maxsize=None)
 def stats_root_kb(show_recap: bool = False, is_private_chat: bool = False) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="🙋 Моя", callback_data=f"stats:open:{SCOPE_MY}"))
-    if is_private_chat:
-        kb.row(InlineKeyboardButton(text="💬 В этой личке", callback_data=f"stats:open:{SCOPE_CHAT}"))
-    else:
-        kb.row(InlineKeyboardButton(text="👥 В этом чате", callback_data=f"stats:open:{SCOPE_CHAT}"))
-    kb.row(InlineKeyboardButton(text="🏟️ Среди чатов", callback_data=f"stats:open:{SCOPE_AMONG}"))
-    kb.row(InlineKeyboardButton(text="🌍 Глобальная", callback_data=f"stats:open:{SCOPE_GLOBAL}"))
+    rows = [
+        [InlineKeyboardButton(text="🙋 Моя", callback_data=f"stats:open:{SCOPE_MY}")],
+        [
+            InlineKeyboardButton(text="💬 В этой личке", callback_data=f"stats:open:{SCOPE_CHAT}")
+            if is_private_chat
+            else InlineKeyboardButton(text="👥 В этом чате", callback_data=f"stats:open:{SCOPE_CHAT}")
+        ],
+        [InlineKeyboardButton(text="🏟️ Среди чатов", callback_data=f"stats:open:{SCOPE_AMONG}")],
+        [InlineKeyboardButton(text="🌍 Глобальная", callback_data=f"stats:open:{SCOPE_GLOBAL}")],
+    ]
     if show_recap:
-        kb.row(InlineKeyboardButton(text="🎉 Рекап года", callback_data=f"stats:open:{SCOPE_RECAP}"))
-    return kb.as_markup()
+        rows.append([InlineKeyboardButton(text="🎉 Рекап года", callback_data=f"stats:open:{SCOPE_RECAP}")])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=None)
 def stats_local_kb() -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data="stats:back:root"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[[_BTN_BACK]])
 
 
+@lru_cache(maxsize=None)
 def stats_global_kb(is_private_chat: bool = False) -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
+    rows = []
     if not is_private_chat:
-        kb.row(InlineKeyboardButton(text="👤 Показать меня", callback_data="stats:global:me"))
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data="stats:back:root"))
-    return kb.as_markup()
+        rows.append([InlineKeyboardButton(text="👤 Показать меня", callback_data="stats:global:me")])
+    rows.append([_BTN_BACK])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=None)
 def stats_among_kb() -> InlineKeyboardMarkup:
-    kb = InlineKeyboardBuilder()
-    kb.row(InlineKeyboardButton(text="⬅️ Назад", callback_data="stats:back:root"))
-    return kb.as_markup()
+    return InlineKeyboardMarkup(inline_keyboard=[[_BTN_BACK]])
@@ -1,8 +1,9 @@
 from dataclasses import dataclass
+from functools import lru_cache
 import os
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Settings:
     bot_token: str
     database_url: str
@@ -14,19 +15,29 @@ class Settings:
     heartbeat_interval_sec: int = 60
     heartbeat_stale_sec: int = 300
     scheduler_chat_throttle_sec: float = 0.2
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+
+
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
 
 
 def _env_bool(name: str, default: bool) -> bool:
     raw = os.getenv(name)
     if raw is None:
         return default
-    return raw.strip().lower() in {"1", "true", "yes", "on"}
+    return raw.strip().lower() in _TRUE_VALUES
 
 
 def _env_int(name: str, default: int) -> int:
     raw = (os.getenv(name) or "").strip()
     if not raw:
         return default
+    try:
+        value = int(raw)
+        return value if value > 0 else default
+    except ValueError:
+        return default
 
 
 def _env_float(name: str, default: float) -> float:
@@ -38,13 +49,9 @@ def _env_float(name: str, default: float) -> float:
         return value if value >= 0 else default
     except ValueError:
         return default
-    try:
-        value = int(raw)
-        return value if value > 0 else default
-    except ValueError:
-        return default
 
 
+@lru_cache(maxsize=1)
 def load_settings() -> Settings:
     bot_token = os.getenv("BOT_TOKEN", "").strip()
     if not bot_token:
@@ -65,4 +72,6 @@ def load_settings() -> Settings:
         heartbeat_interval_sec=_env_int("HEARTBEAT_INTERVAL_SEC", 60),
         heartbeat_stale_sec=_env_int("HEARTBEAT_STALE_SEC", 300),
         scheduler_chat_throttle_sec=_env_float("SCHEDULER_CHAT_THROTTLE_SEC", 0.2),
+        db_pool_size=_env_int("DB_POOL_SIZE", 10),
+        db_max_overflow=_env_int("DB_MAX_OVERFLOW", 10),
     )
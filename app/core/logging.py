@@ -1,11 +1,26 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 
 
 def setup_logging(level: str = "INFO") -> None:
-    logging.basicConfig(
-        level=getattr(logging, level.upper(), logging.INFO),
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-    )
+    # The format uses none of these record fields, so skip collecting them.
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    # Handlers only enqueue records; a listener thread does the stderr writes off the event loop.
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(name)s | %(message)s"))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    enqueue = logging.handlers.QueueHandler(log_queue)
+    enqueue.setFormatter(logging.Formatter("%(message)s"))  # prepare() merges args/traceback into msg
+    logging.basicConfig(level=getattr(logging, level.upper(), logging.INFO), handlers=[enqueue])
     # Reduce scheduler noise in production logs while preserving warnings/errors.
     logging.getLogger("apscheduler").setLevel(logging.WARNING)
     logging.getLogger("apscheduler.executors.default").setLevel(logging.WARNING)
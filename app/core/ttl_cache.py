@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """Process-local cache with a fixed per-entry TTL and a hard size cap.
+
+    With one TTL per cache, insertion order is expiry order, so a full cache drops its
+    oldest entries first and expired ones are always at the front.
+    """
+
+    __slots__ = ("_ttl_sec", "_maxsize", "_data")
+
+    def __init__(self, ttl_sec: float, maxsize: int) -> None:
+        self._ttl_sec = ttl_sec
+        self._maxsize = maxsize
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        hit = self._data.get(key)
+        if hit is None:
+            return None
+        if monotonic() >= hit[1]:
+            del self._data[key]
+            return None
+        return hit[0]
+
+    def set(self, key: K, value: V) -> None:
+        data = self._data
+        now = monotonic()
+        data.pop(key, None)
+        while data and (len(data) >= self._maxsize or next(iter(data.values()))[1] <= now):
+            data.popitem(last=False)
+        data[key] = (value, now + self._ttl_sec)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def discard_if(self, predicate: Callable[[K], bool]) -> None:
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
@@ -1,13 +1,27 @@
 from __future__ import annotations
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 
-def make_engine(database_url: str) -> Engine:
-    return create_engine(database_url, pool_pre_ping=True)
+def make_engine(database_url: str, *, pool_size: int = 10, max_overflow: int = 10) -> Engine:
+    # Handlers and scheduler jobs run on worker threads, so the pool should cover their concurrency.
+    return create_engine(
+        database_url,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_recycle=1800,
+        pool_timeout=10,
+    )
 
 
 def make_session_factory(engine: Engine) -> sessionmaker:
     return sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+
+
+def warm_up_engine(engine: Engine) -> None:
+    """Open the first pooled connection at startup (and fail fast on a bad DATABASE_URL)."""
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
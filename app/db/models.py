@@ -2,13 +2,16 @@ from __future__ import annotations
 
 from datetime import datetime, date, time
 from sqlalchemy import (
-    BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Integer,
-    String, Text, Time, UniqueConstraint, PrimaryKeyConstraint
+    BigInteger, Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer,
+    String, Text, Time, UniqueConstraint, PrimaryKeyConstraint, func, text
 )
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
 
+# Naive UTC timestamps, filled in by Postgres instead of a Python call per row.
+UTC_NOW = text("timezone('utc', now())")
+
 
 class Chat(Base):
     __tablename__ = "chats"
@@ -19,7 +22,7 @@ class Chat(Base):
     notifications_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     is_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
     show_in_global: Mapped[bool] = mapped_column(Boolean, default=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
     help_message_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     help_owner_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
@@ -32,21 +35,27 @@ class User(Base):
     username: Mapped[str | None] = mapped_column(String(64), nullable=True)
     first_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
     last_name: Mapped[str | None] = mapped_column(String(128), nullable=True)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=func.timezone("utc", func.now()))
 
 
 class ChatMember(Base):
     __tablename__ = "chat_members"
-    __table_args__ = (PrimaryKeyConstraint("chat_id", "user_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("chat_id", "user_id"),
+        Index("ix_chat_members_user", "user_id"),
+    )
 
     chat_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("chats.chat_id", ondelete="CASCADE"))
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"))
-    joined_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    joined_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
 
 class Session(Base):
     __tablename__ = "sessions"
-    __table_args__ = (UniqueConstraint("chat_id", "session_date", name="uq_chat_session_date"),)
+    __table_args__ = (
+        UniqueConstraint("chat_id", "session_date", name="uq_chat_session_date"),
+        Index("ix_sessions_session_date", "session_date"),
+    )
 
     session_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     chat_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("chats.chat_id", ondelete="CASCADE"))
@@ -58,7 +67,7 @@ class Session(Base):
         nullable=False,
     )
 
-    start_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    start_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
     end_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
     reminded_22_sent: Mapped[bool] = mapped_column(Boolean, default=False)
@@ -75,7 +84,10 @@ class SessionMessage(Base):
 
 class UserStreak(Base):
     __tablename__ = "user_streaks"
-    __table_args__ = (PrimaryKeyConstraint("chat_id", "user_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("chat_id", "user_id"),
+        Index("ix_user_streaks_user", "user_id"),
+    )
 
     chat_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("chats.chat_id", ondelete="CASCADE"))
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"))
@@ -85,7 +97,10 @@ class UserStreak(Base):
 
 class SessionUserState(Base):
     __tablename__ = "session_user_state"
-    __table_args__ = (PrimaryKeyConstraint("session_id", "user_id"),)
+    __table_args__ = (
+        PrimaryKeyConstraint("session_id", "user_id"),
+        Index("ix_session_user_state_user", "user_id", "session_id"),
+    )
 
     session_id: Mapped[int] = mapped_column(Integer, ForeignKey("sessions.session_id", ondelete="CASCADE"))
     user_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("users.user_id", ondelete="CASCADE"))
@@ -101,7 +116,7 @@ class SessionUserState(Base):
         nullable=True,
     )
 
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=func.timezone("utc", func.now()))
 
 
 class PoopEvent(Base):
@@ -119,8 +134,8 @@ class PoopEvent(Base):
         Enum("great", "ok", "bad", name="feeling_kind"),
         nullable=True,
     )
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=func.timezone("utc", func.now()))
 
 
 class RateLimit(Base):
@@ -130,7 +145,7 @@ class RateLimit(Base):
     chat_id: Mapped[int] = mapped_column(BigInteger)
     user_id: Mapped[int] = mapped_column(BigInteger)
     scope: Mapped[str] = mapped_column(String(32))
-    last_action_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    last_action_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
 
 
 class CommandMessage(Base):
@@ -142,4 +157,4 @@ class CommandMessage(Base):
     command: Mapped[str] = mapped_column(String(32))  # e.g. "stats"
     session_date: Mapped[date] = mapped_column(Date, nullable=False)
     message_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=UTC_NOW)
@@ -1,7 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 from contextlib import contextmanager
-from sqlalchemy.orm import Session, sessionmaker
+from typing import Any, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction, sessionmaker
+
+T = TypeVar("T")
+
+_AFTER_TRANSACTION_KEY = "after_transaction"
 
 
 @contextmanager
@@ -15,3 +23,26 @@ def db_session(session_factory: sessionmaker) -> Session:
         raise
     finally:
         session.close()
+
+
+def after_transaction(session: Session, fn: Callable[..., Any], /, *args: Any) -> None:
+    """Call fn(*args) once session's current transaction has committed or rolled back (e.g. to drop a cache entry)."""
+    session.info.setdefault(_AFTER_TRANSACTION_KEY, []).append((fn, args))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _run_after_transaction(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is not None:
+        return
+    for fn, args in session.info.pop(_AFTER_TRANSACTION_KEY, ()):
+        fn(*args)
+
+
+async def run_in_session(session_factory: sessionmaker, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run fn(db, *args, **kwargs) in its own db_session on a worker thread, off the event loop."""
+
+    def _call() -> T:
+        with db_session(session_factory) as db:
+            return fn(db, *args, **kwargs)
+
+    return await asyncio.to_thread(_call)
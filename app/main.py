@@ -3,11 +3,19 @@ from app.core.config import load_settings
 from app.core.logging import setup_logging
 from app.bot.dispatcher import run_bot
 
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
+
 
 def main() -> None:
     settings = load_settings()
     setup_logging(settings.log_level)
-    asyncio.run(run_bot(settings))
+    if uvloop is not None:
+        uvloop.run(run_bot(settings))
+    else:
+        asyncio.run(run_bot(settings))
 
 
 if __name__ == "__main__":
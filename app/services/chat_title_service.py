@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Iterable
+
+from aiogram import Bot
+
+GET_CHAT_CONCURRENCY = 10
+CHAT_TITLE_TTL_SEC = 3600
+
+# chat_id -> (title, monotonic expiry); only successful lookups are kept
+_title_cache: dict[int, tuple[str, float]] = {}
+
+
+async def fetch_chat_titles(bot: Bot, chat_ids: Iterable[int]) -> dict[int, str | None]:
+    """chat_id -> title (or full name for private chats); None when Telegram didn't give one."""
+    now = time.monotonic()
+    titles: dict[int, str | None] = {}
+    missing: list[int] = []
+    for cid in set(chat_ids):
+        cached = _title_cache.get(cid)
+        if cached is not None and now < cached[1]:
+            titles[cid] = cached[0]
+        else:
+            missing.append(cid)
+
+    if not missing:
+        return titles
+
+    sem = asyncio.Semaphore(GET_CHAT_CONCURRENCY)
+
+    async def _fetch(cid: int) -> tuple[int, str | None]:
+        async with sem:
+            try:
+                chat = await bot.get_chat(cid)
+            except Exception:
+                return cid, None
+        return cid, getattr(chat, "title", None) or getattr(chat, "full_name", None)
+
+    expires_at = time.monotonic() + CHAT_TITLE_TTL_SEC
+    for cid, title in await asyncio.gather(*(_fetch(cid) for cid in missing)):
+        titles[cid] = title
+        if title:
+            _title_cache[cid] = (title, expires_at)
+        else:
+            _title_cache.pop(cid, None)
+    return titles
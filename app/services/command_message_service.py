@@ -3,16 +3,37 @@ from __future__ import annotations
 from datetime import date
 from sqlalchemy.orm import Session
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
+from app.core.ttl_cache import TTLCache
 from app.db.models import CommandMessage, User
+from app.db.session import after_transaction
+
+COMMAND_MESSAGE_TTL_SEC = 300
+# (chat_id, user_id, command, session_date) -> message_id; only ids already stored
+_command_message_ids: TTLCache[tuple[int, int, str, date], int] = TTLCache(COMMAND_MESSAGE_TTL_SEC, maxsize=10_000)
+
+
+def forget_command_messages(user_id: int, chat_id: int | None = None) -> None:
+    _command_message_ids.discard_if(lambda k: k[1] == user_id and (chat_id is None or k[0] == chat_id))
 
 
 def get_command_message_id(db: Session, chat_id: int, user_id: int, command: str, session_date: date) -> int | None:
+    key = (chat_id, user_id, command, session_date)
+    message_id = _command_message_ids.get(key)
+    if message_id is not None:
+        return message_id
+
     row = db.get(
         CommandMessage,
         {"chat_id": chat_id, "user_id": user_id, "command": command, "session_date": session_date},
     )
-    return row.message_id if row else None
+    if row is None:
+        # Misses are not cached: the scheduler relies on them to see a reminder hasn't been sent yet.
+        return None
+    if row not in db.new and not db.is_modified(row):
+        _command_message_ids.set(key, row.message_id)
+    return row.message_id
 
 
 def get_any_command_message_id(db: Session, chat_id: int, command: str, session_date: date) -> int | None:
@@ -30,25 +51,25 @@ def get_any_command_message_id(db: Session, chat_id: int, command: str, session_
 
 
 def set_command_message_id(db: Session, chat_id: int, user_id: int, command: str, session_date: date, message_id: int) -> None:
+    key = (chat_id, user_id, command, session_date)
+    _command_message_ids.pop(key)
+    # Other sessions still see the old id until this one commits and may cache it meanwhile; drop it again then.
+    after_transaction(db, _command_message_ids.pop, key)
     # Some command messages are system-level and use user_id=0.
     # Ensure FK target exists to avoid transaction rollback.
-    if user_id == 0 and db.get(User, 0) is None:
-        db.add(User(user_id=0, username=None, first_name="system", last_name=None))
-        db.flush()
+    if user_id == 0:
+        db.execute(
+            pg_insert(User).values(user_id=0, first_name="system").on_conflict_do_nothing(index_elements=[User.user_id])
+        )
 
-    row = db.get(
-        CommandMessage,
-        {"chat_id": chat_id, "user_id": user_id, "command": command, "session_date": session_date},
+    # One upsert instead of get-then-add; populate_existing refreshes a row already loaded in this session.
+    stmt = pg_insert(CommandMessage).values(
+        chat_id=chat_id, user_id=user_id, command=command, session_date=session_date, message_id=message_id
     )
-    if row is None:
-        db.add(
-            CommandMessage(
-                chat_id=chat_id,
-                user_id=user_id,
-                command=command,
-                session_date=session_date,
-                message_id=message_id,
-            )
-        )
-    else:
-        row.message_id = message_id
+    db.scalars(
+        stmt.on_conflict_do_update(
+            index_elements=[CommandMessage.chat_id, CommandMessage.user_id, CommandMessage.command, CommandMessage.session_date],
+            set_={"message_id": stmt.excluded.message_id},
+        ).returning(CommandMessage),
+        execution_options={"populate_existing": True},
+    ).one()
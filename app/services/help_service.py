@@ -5,6 +5,10 @@ from sqlalchemy.orm import Session
 from sqlalchemy import delete, select
 
 from app.db.models import Chat, ChatMember, CommandMessage, PoopEvent, Session as DaySession, SessionUserState, User, UserStreak
+from app.db.session import after_transaction
+from app.services.command_message_service import forget_command_messages
+from app.services.recap_service import forget_recap_cards
+from app.services.repo_service import forget_user
 
 
 def set_chat_post_time(db: Session, chat_id: int, hour: int) -> None:
@@ -52,6 +56,10 @@ def delete_user_everywhere(db: Session, chat_id: int, user_id: int) -> None:
     db.execute(delete(UserStreak).where(UserStreak.chat_id == chat_id, UserStreak.user_id == user_id))
     db.execute(delete(SessionUserState).where(SessionUserState.user_id == user_id))
     db.execute(delete(User).where(User.user_id == user_id))
+    # Evict once the delete is visible, otherwise a concurrent upsert_user could re-cache the doomed row.
+    after_transaction(db, forget_user, user_id)
+    after_transaction(db, forget_command_messages, user_id)
+    after_transaction(db, forget_recap_cards, user_id)
 
 
 def delete_user_from_chat(db: Session, chat_id: int, user_id: int) -> None:
@@ -72,3 +80,5 @@ def delete_user_from_chat(db: Session, chat_id: int, user_id: int) -> None:
         )
     )
     db.execute(delete(CommandMessage).where(CommandMessage.chat_id == chat_id, CommandMessage.user_id == user_id))
+    after_transaction(db, forget_command_messages, user_id, chat_id)
+    after_transaction(db, forget_recap_cards, user_id, chat_id)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import random
+from dataclasses import dataclass
 from datetime import date, timedelta
 
 from sqlalchemy import select
@@ -27,6 +28,12 @@ FEELING_EMOJI = {
 }
 
 
+@dataclass(frozen=True)
+class Q1Render:
+    text: str
+    has_members: bool
+
+
 def mention(u: User) -> str:
     if u.username:
         return f"@{u.username}"
@@ -93,11 +100,20 @@ def apply_minus(db: Session, session_id: int, user_id: int) -> tuple[bool, str]:
     return True, "Ок"
 
 
-def render_q1(db: Session, chat_id: int, session_id: int, session_date: date) -> str:
+def render_q1(
+    db: Session,
+    chat_id: int,
+    session_id: int,
+    session_date: date,
+) -> Q1Render:
     date_str = session_date.strftime("%d.%m.%y")
 
+    # chat_members.user_id is a FK to users, so the inner join keeps every member, in join order.
     members = db.scalars(
-        select(ChatMember).where(ChatMember.chat_id == chat_id).order_by(ChatMember.joined_at.asc())
+        select(User)
+        .join(ChatMember, ChatMember.user_id == User.user_id)
+        .where(ChatMember.chat_id == chat_id)
+        .order_by(ChatMember.joined_at.asc())
     ).all()
 
     header = (
@@ -106,10 +122,8 @@ def render_q1(db: Session, chat_id: int, session_id: int, session_date: date) ->
     )
 
     if not members:
-        return header + "\n(Пока никто не участвует)"
+        return Q1Render(header + "\n(Пока никто не участвует)", has_members=False)
 
-    user_ids = [m.user_id for m in members]
-    users = {u.user_id: u for u in db.scalars(select(User).where(User.user_id.in_(user_ids))).all()}
     states = {
         s.user_id: s
         for s in db.scalars(select(SessionUserState).where(SessionUserState.session_id == session_id)).all()
@@ -121,10 +135,8 @@ def render_q1(db: Session, chat_id: int, session_id: int, session_date: date) ->
 
     lines = [header, "", "Участники:"]
 
-    for uid in user_ids:
-        u = users.get(uid)
-        if not u:
-            continue
+    for u in members:
+        uid = u.user_id
         st = states.get(uid)
         poops = int(st.poops_n) if st else 0
 
@@ -142,4 +154,4 @@ def render_q1(db: Session, chat_id: int, session_id: int, session_date: date) ->
 
         lines.append(f"{mention(u)} — {' • '.join(status_bits)}")
 
-    return "\n".join(lines)
+    return Q1Render("\n".join(lines), has_members=True)
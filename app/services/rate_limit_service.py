@@ -1,32 +1,81 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from app.db.models import RateLimit
+from app.services.time_service import utcnow
 
+# (chat_id, user_id, scope) -> monotonic deadline until which actions are blocked
+_local_blocked_until: dict[tuple[int, int, str], float] = {}
+_LOCAL_SWEEP_THRESHOLD = 10_000
 
-def check_rate_limit(
-    db: Session,
+
+def check_local_rate_limit(
     chat_id: int,
     user_id: int,
     scope: str,
     cooldown_seconds: int = 2,
 ) -> bool:
     """
+    Process-local cooldown check, no DB access.
     True  => allowed
     False => blocked
     """
-    now = datetime.utcnow()
-    rl = db.get(RateLimit, {"chat_id": chat_id, "user_id": user_id, "scope": scope})
+    now = time.monotonic()
+    key = (chat_id, user_id, scope)
+    blocked_until = _local_blocked_until.get(key)
+    if blocked_until is not None and now < blocked_until:
+        return False
+
+    _local_blocked_until[key] = now + cooldown_seconds
+    if len(_local_blocked_until) > _LOCAL_SWEEP_THRESHOLD:
+        for stale_key in [k for k, until in _local_blocked_until.items() if until <= now]:
+            del _local_blocked_until[stale_key]
+    return True
 
-    if rl is None:
-        rl = RateLimit(chat_id=chat_id, user_id=user_id, scope=scope, last_action_at=now)
-        db.add(rl)
-        return True
 
-    if now - rl.last_action_at < timedelta(seconds=cooldown_seconds):
+def check_rate_limit(
+    db: Session,
+    chat_id: int,
+    user_id: int,
+    scope: str,
+    cooldown_seconds: int = 2,
+) -> bool:
+    """
+    True  => allowed
+    False => blocked
+    """
+    # Fast path: repeated taps are rejected in-process without touching the DB.
+    if not check_local_rate_limit(chat_id, user_id, scope, cooldown_seconds):
         return False
+    return check_db_rate_limit(db, chat_id, user_id, scope, cooldown_seconds)
 
-    rl.last_action_at = now
-    return True
+
+def check_db_rate_limit(
+    db: Session,
+    chat_id: int,
+    user_id: int,
+    scope: str,
+    cooldown_seconds: int = 2,
+) -> bool:
+    """
+    DB-backed cooldown check (survives restarts, shared between processes).
+    True  => allowed
+    False => blocked
+    """
+    now = utcnow()
+    stmt = (
+        pg_insert(RateLimit)
+        .values(chat_id=chat_id, user_id=user_id, scope=scope, last_action_at=now)
+        .on_conflict_do_update(
+            index_elements=[RateLimit.chat_id, RateLimit.user_id, RateLimit.scope],
+            set_={"last_action_at": now},
+            # Row is touched only once the cooldown is over; no row back => blocked.
+            where=RateLimit.last_action_at <= now - timedelta(seconds=cooldown_seconds),
+        )
+        .returning(RateLimit.chat_id)
+    )
+    return db.execute(stmt).first() is not None
@@ -5,9 +5,25 @@ from datetime import date, timedelta
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
+from app.core.ttl_cache import TTLCache
 from app.db.models import Session as DaySession
 from app.db.models import SessionUserState, PoopEvent, User, ChatMember
 
+RECAP_CARDS_TTL_SEC = 15 * 60
+# ("chat", chat_id, year, member_id | None) / ("my", chat_id | 0, user_id, year) -> cards
+recap_cards_cache: TTLCache[tuple, list[str]] = TTLCache(RECAP_CARDS_TTL_SEC, maxsize=1000)
+
+
+def forget_recap_cards(user_id: int, chat_id: int | None = None) -> None:
+    """Drop cards that may hold user_id's rows: their personal cards and the chat cards of chat_id (or of every chat)."""
+
+    def _affected(key: tuple) -> bool:
+        if key[0] == "my":
+            return key[2] == user_id and (chat_id is None or key[1] in (chat_id, 0))
+        return chat_id is None or key[1] == chat_id
+
+    recap_cards_cache.discard_if(_affected)
+
 
 def _year_flavor(year: int) -> tuple[str, str, str]:
     packs = {
@@ -58,31 +74,17 @@ def recap_target_year(today: date) -> int:
     return today.year
 
 
+def is_recap_season_near(today_utc: date) -> bool:
+    """Loose UTC superset of the Dec 30 - Jan 3 window (any tz offset is within a day)."""
+    return (today_utc.month == 12 and today_utc.day >= 29) or (today_utc.month == 1 and today_utc.day <= 4)
+
+
 def is_recap_available(today: date, user_id: int, owner_id: int | None) -> bool:
     if owner_id is not None and int(user_id) == int(owner_id):
         return True
     return (today.month == 12 and today.day >= 30) or (today.month == 1 and today.day <= 3)
 
 
-def list_user_recap_chat_ids(db: Session, user_id: int, year: int) -> list[int]:
-    start = date(year, 1, 1)
-    end = date(year, 12, 31)
-    rows = db.scalars(
-        select(DaySession.chat_id)
-        .join(SessionUserState, SessionUserState.session_id == DaySession.session_id)
-        .where(
-            DaySession.chat_id < 0,
-            DaySession.session_date >= start,
-            DaySession.session_date <= end,
-            SessionUserState.user_id == user_id,
-            SessionUserState.poops_n > 0,
-        )
-        .group_by(DaySession.chat_id)
-        .order_by(DaySession.chat_id.asc())
-    ).all()
-    return [int(cid) for cid in rows]
-
-
 def list_user_member_chat_ids(db: Session, user_id: int) -> list[int]:
     rows = db.scalars(
         select(ChatMember.chat_id)
@@ -96,6 +98,30 @@ def list_user_member_chat_ids(db: Session, user_id: int) -> list[int]:
     return [int(cid) for cid in rows]
 
 
+def is_user_chat_member(db: Session, user_id: int, chat_id: int) -> bool:
+    """Point lookup for a single group chat, instead of listing all of the user's chats."""
+    return chat_id < 0 and db.get(ChatMember, {"chat_id": chat_id, "user_id": user_id}) is not None
+
+
+def has_user_recap_in_chat(db: Session, user_id: int, chat_id: int, year: int) -> bool:
+    if chat_id >= 0:
+        return False
+    return db.scalar(
+        select(
+            select(DaySession.session_id)
+            .join(SessionUserState, SessionUserState.session_id == DaySession.session_id)
+            .where(
+                DaySession.chat_id == chat_id,
+                DaySession.session_date >= date(year, 1, 1),
+                DaySession.session_date <= date(year, 12, 31),
+                SessionUserState.user_id == user_id,
+                SessionUserState.poops_n > 0,
+            )
+            .exists()
+        )
+    )
+
+
 def pick_user_recap_source_chat(db: Session, user_id: int, year: int) -> int | None:
     start = date(year, 1, 1)
     end = date(year, 12, 31)
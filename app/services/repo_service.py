@@ -1,35 +1,71 @@
 from __future__ import annotations
 
-from datetime import datetime, time, date
+from datetime import time, date
 from typing import Optional
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from app.core.ttl_cache import TTLCache
 from app.db.models import Chat, User, ChatMember, Session as DaySession, SessionMessage, SessionUserState, UserStreak
+from app.db.session import after_transaction
 
 
 def upsert_chat(db: Session, chat_id: int) -> Chat:
     chat = db.get(Chat, chat_id)
     if chat is None:
-        chat = Chat(chat_id=chat_id, timezone="Europe/Minsk", post_time=time(10, 0), is_enabled=True)
+        chat = Chat(chat_id=chat_id, timezone=DEFAULT_TIMEZONE, post_time=time(10, 0), is_enabled=True)
         db.add(chat)
     elif not chat.is_enabled:
         chat.is_enabled = True
     return chat
 
 
-def upsert_user(db: Session, user_id: int, username: Optional[str], first_name: Optional[str], last_name: Optional[str]) -> User:
+DEFAULT_TIMEZONE = "Europe/Minsk"
+CHAT_TZ_TTL_SEC = 10 * 60
+_chat_tz_cache: TTLCache[int, str] = TTLCache(CHAT_TZ_TTL_SEC, maxsize=10_000)
+
+
+def get_chat_timezone(db: Session, chat_id: int) -> str:
+    """Chat timezone without a SELECT on every update; a chat's timezone is fixed at creation."""
+    tz_name = _chat_tz_cache.get(chat_id)
+    if tz_name is not None:
+        return tz_name
+
+    chat = db.get(Chat, chat_id)
+    if chat is None:
+        return DEFAULT_TIMEZONE
+    _chat_tz_cache.set(chat_id, chat.timezone)
+    return chat.timezone
+
+
+# user_id -> (username, first_name, last_name) already confirmed to be stored in DB
+_user_fingerprints: dict[int, tuple[Optional[str], Optional[str], Optional[str]]] = {}
+
+
+def forget_user(user_id: int) -> None:
+    _user_fingerprints.pop(user_id, None)
+
+
+def upsert_user(db: Session, user_id: int, username: Optional[str], first_name: Optional[str], last_name: Optional[str]) -> None:
+    fingerprint = (username, first_name, last_name)
+    if _user_fingerprints.get(user_id) == fingerprint:
+        return
+
     user = db.get(User, user_id)
     if user is None:
-        user = User(user_id=user_id, username=username, first_name=first_name, last_name=last_name)
-        db.add(user)
-        return user
+        db.add(User(user_id=user_id, username=username, first_name=first_name, last_name=last_name))
+        return
+
+    if (user.username, user.first_name, user.last_name) == fingerprint:
+        # Only rows read back unchanged are cached, so a rolled back write is never trusted.
+        _user_fingerprints[user_id] = fingerprint
+        return
 
     user.username = username
     user.first_name = first_name
     user.last_name = last_name
-    return user
 
 
 def ensure_chat_member(db: Session, chat_id: int, user_id: int) -> ChatMember:
@@ -41,7 +77,7 @@ def ensure_chat_member(db: Session, chat_id: int, user_id: int) -> ChatMember:
 
     member = db.get(ChatMember, {"chat_id": chat_id, "user_id": user_id})
     if member is None:
-        member = ChatMember(chat_id=chat_id, user_id=user_id, joined_at=datetime.utcnow())
+        member = ChatMember(chat_id=chat_id, user_id=user_id)
         db.add(member)
 
         # streak row (per chat+user) create too
@@ -55,24 +91,62 @@ def get_or_create_session(db: Session, chat_id: int, session_date: date) -> DayS
     stmt = select(DaySession).where(DaySession.chat_id == chat_id, DaySession.session_date == session_date)
     sess = db.scalar(stmt)
     if sess is None:
-        sess = DaySession(chat_id=chat_id, session_date=session_date, status="active", start_at=datetime.utcnow(), end_at=None)
+        sess = DaySession(chat_id=chat_id, session_date=session_date, status="active", end_at=None)
         db.add(sess)
         db.flush()  # to get session_id
     return sess
 
 
+def get_or_create_session_with_message(
+    db: Session, chat_id: int, session_date: date, kind: str
+) -> tuple[DaySession, Optional[int]]:
+    """The day's session plus its `kind` message id, read in one query."""
+    row = db.execute(
+        select(DaySession, SessionMessage.message_id)
+        .outerjoin(
+            SessionMessage,
+            (SessionMessage.session_id == DaySession.session_id) & (SessionMessage.kind == kind),
+        )
+        .where(DaySession.chat_id == chat_id, DaySession.session_date == session_date)
+    ).first()
+    if row is None:
+        # A session created now has no messages yet.
+        return get_or_create_session(db, chat_id=chat_id, session_date=session_date), None
+    return row[0], row[1]
+
+
+SESSION_MESSAGE_TTL_SEC = 300
+# (session_id, kind) -> message_id; only ids already stored, misses are not cached
+_session_message_ids: TTLCache[tuple[int, str], int] = TTLCache(SESSION_MESSAGE_TTL_SEC, maxsize=10_000)
+
+
 def get_session_message_id(db: Session, session_id: int, kind: str) -> Optional[int]:
+    key = (session_id, kind)
+    message_id = _session_message_ids.get(key)
+    if message_id is not None:
+        return message_id
+
     sm = db.get(SessionMessage, {"session_id": session_id, "kind": kind})
-    return sm.message_id if sm else None
+    if sm is None:
+        return None
+    if sm not in db.new and not db.is_modified(sm):
+        _session_message_ids.set(key, sm.message_id)
+    return sm.message_id
 
 
 def set_session_message_id(db: Session, session_id: int, kind: str, message_id: int) -> None:
-    sm = db.get(SessionMessage, {"session_id": session_id, "kind": kind})
-    if sm is None:
-        sm = SessionMessage(session_id=session_id, kind=kind, message_id=message_id)
-        db.add(sm)
-    else:
-        sm.message_id = message_id
+    key = (session_id, kind)
+    _session_message_ids.pop(key)
+    # Other sessions still see the old id until this one commits and may cache it meanwhile; drop it again then.
+    after_transaction(db, _session_message_ids.pop, key)
+    stmt = pg_insert(SessionMessage).values(session_id=session_id, kind=kind, message_id=message_id)
+    db.scalars(
+        stmt.on_conflict_do_update(
+            index_elements=[SessionMessage.session_id, SessionMessage.kind],
+            set_={"message_id": stmt.excluded.message_id},
+        ).returning(SessionMessage),
+        execution_options={"populate_existing": True},
+    ).one()
 
 
 def get_or_create_session_user_state(db: Session, session_id: int, user_id: int) -> SessionUserState:
@@ -86,7 +160,6 @@ def get_or_create_session_user_state(db: Session, session_id: int, user_id: int)
             remind_22=False,
             bristol=None,
             feeling=None,
-            updated_at=datetime.utcnow(),
         )
         db.add(sus)
     return sus
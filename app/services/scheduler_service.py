@@ -2,14 +2,14 @@ from __future__ import annotations
 
 import logging
 import asyncio
-from datetime import datetime, timedelta, date, time
+from datetime import timedelta, date, time
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
 
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.orm import sessionmaker
 
 from app.db.models import Chat, Session as DaySession, SessionUserState, ChatMember, User, UserStreak
@@ -19,7 +19,7 @@ from app.services.repo_service import (
     get_session_message_id,
     set_session_message_id,
 )
-from app.services.time_service import get_session_window, now_in_tz
+from app.services.time_service import get_session_window, now_in_tz, utcnow
 from app.services.q1_service import mention, render_q1
 from app.services.q2_q3_service import ensure_q2_q3_exist
 from app.services.stats_service import build_stats_text_chat
@@ -119,20 +119,21 @@ async def _safe_edit_message_text(bot: Bot, **kwargs):
 
 async def _tick(bot: Bot, session_factory: sessionmaker, chat_throttle_sec: float = 0.2) -> None:
     with db_session(session_factory) as db:
-        chats = db.scalars(select(Chat).where(Chat.is_enabled == True)).all()
+        # Ids only: _process_chat re-reads each chat in its own session anyway.
+        chat_ids = db.scalars(select(Chat.chat_id).where(Chat.is_enabled == True)).all()
 
-    for chat in chats:
+    for chat_id in chat_ids:
         try:
-            await _process_chat(bot, session_factory, chat.chat_id)
+            await _process_chat(bot, session_factory, chat_id)
         except TelegramForbiddenError:
             # Bot no longer has access to this chat (kicked/blocked): stop scheduling it.
             with db_session(session_factory) as db:
-                stale_chat = db.get(Chat, chat.chat_id)
+                stale_chat = db.get(Chat, chat_id)
                 if stale_chat is not None:
                     stale_chat.is_enabled = False
-            logger.warning("Disabled chat after TelegramForbiddenError chat_id=%s", chat.chat_id)
+            logger.warning("Disabled chat after TelegramForbiddenError chat_id=%s", chat_id)
         except Exception:
-            logger.exception("Scheduler chat processing failed chat_id=%s", chat.chat_id)
+            logger.exception("Scheduler chat processing failed chat_id=%s", chat_id)
         if chat_throttle_sec > 0:
             await asyncio.sleep(chat_throttle_sec)
 
@@ -193,14 +194,7 @@ async def _process_chat(bot: Bot, session_factory: sessionmaker, chat_id: int) -
         if notifications_enabled and local_time.hour == chat.post_time.hour and local_time.minute == chat.post_time.minute:
             q1_id = get_session_message_id(db, sess.session_id, "Q1")
             if not q1_id:
-                await _post_q1(
-                    bot,
-                    db,
-                    chat_id,
-                    sess.session_id,
-                    window.session_date,
-                    show_remind=(local_time < time(22, 0)),
-                )
+                await _post_q1(bot, db, chat_id, sess.session_id, window.session_date)
 
         if notifications_enabled and local_time.hour == 23 and local_time.minute == 30:
             await _send_late_reminder(bot, db, chat_id, sess.session_id)
@@ -219,7 +213,6 @@ async def _post_q1(
     chat_id: int,
     session_id: int,
     session_date,
-    show_remind: bool = True,
 ) -> None:
     if session_date.month == 12 and session_date.day == 30:
         sent_recap_mid = get_command_message_id(db, chat_id, 0, "recap_announce", session_date)
@@ -238,15 +231,12 @@ async def _post_q1(
             # System marker: sent once per chat/day
             set_command_message_id(db, chat_id, 0, "recap_announce", session_date, recap_sent.message_id)
 
-    member_count = db.scalar(select(func.count()).select_from(ChatMember).where(ChatMember.chat_id == chat_id)) or 0
-    has_any_members = member_count > 0
-
-    text = render_q1(db, chat_id=chat_id, session_id=session_id, session_date=session_date)
+    q1 = render_q1(db, chat_id=chat_id, session_id=session_id, session_date=session_date)
     sent = await _safe_send_message(
         bot,
         chat_id=chat_id,
-        text=text,
-        reply_markup=q1_keyboard(has_any_members, show_remind=show_remind),
+        text=q1.text,
+        reply_markup=q1_keyboard(q1.has_members),
     )
     set_session_message_id(db, session_id, "Q1", sent.message_id)
     await ensure_q2_q3_exist(bot, db, chat_id, session_id)
@@ -309,7 +299,7 @@ async def _close_session(bot: Bot, db, chat_id: int, session_id: int, tz_name: s
         return
 
     sess.status = "closed"
-    sess.end_at = datetime.utcnow()
+    sess.end_at = utcnow()
 
     # СЃС‚СЂРёРєРё: РµСЃР»Рё СЃРµРіРѕРґРЅСЏ poops_n > 0 в†’ +1 РґРµРЅСЊ РїРѕРґСЂСЏРґ, РёРЅР°С‡Рµ СЃР±СЂРѕСЃ
     member_rows = db.execute(
@@ -350,8 +340,8 @@ async def _lock_q1(bot: Bot, db, chat_id: int, session_id: int) -> None:
         return
 
     sess = db.get(DaySession, session_id)
-    text = render_q1(db, chat_id=chat_id, session_id=session_id, session_date=sess.session_date)
-    text = f"{LOCK_LINE}\n\n{text}"
+    q1 = render_q1(db, chat_id=chat_id, session_id=session_id, session_date=sess.session_date)
+    text = f"{LOCK_LINE}\n\n{q1.text}"
     await _safe_edit_message_text(bot, chat_id=chat_id, message_id=mid, text=text, reply_markup=None)
 
 
@@ -417,18 +407,13 @@ async def _refresh_current_q1_view(bot: Bot, db, chat_id: int, session_date: dat
     if not q1_id:
         return
 
-    text = render_q1(db, chat_id=chat_id, session_id=sess.session_id, session_date=session_date)
-    has_any_members = "Участники:" in text
-    chat = db.get(Chat, chat_id)
-    show_remind = True
-    if chat is not None:
-        show_remind = now_in_tz(chat.timezone).time() < time(22, 0)
+    q1 = render_q1(db, chat_id=chat_id, session_id=sess.session_id, session_date=session_date)
     await _safe_edit_message_text(
         bot,
         chat_id=chat_id,
         message_id=q1_id,
-        text=text,
-        reply_markup=q1_keyboard(has_any_members, show_remind=show_remind),
+        text=q1.text,
+        reply_markup=q1_keyboard(q1.has_members),
     )
 
 
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, date, time
+from datetime import datetime, date, time, timezone
+from functools import lru_cache
+from time import time as _unix_time
 import pytz
 
 
@@ -12,13 +14,33 @@ class SessionWindow:
     is_active_window: bool   # 00:05–23:55
 
 
+@lru_cache(maxsize=256)
+def _tz(tz_name: str):
+    return pytz.timezone(tz_name)
+
+
 def now_in_tz(tz_name: str) -> datetime:
-    tz = pytz.timezone(tz_name)
-    return datetime.now(tz)
+    return datetime.now(_tz(tz_name))
+
+
+def utcnow() -> datetime:
+    """Naive UTC now, the convention of every DateTime column in the schema."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def get_session_window(tz_name: str, now: datetime | None = None) -> SessionWindow:
+    if now is None:
+        return _window_for_minute(tz_name, int(_unix_time()) // 60)
+    return _window_at(now)
+
+
+@lru_cache(maxsize=1024)
+def _window_for_minute(tz_name: str, epoch_minute: int) -> SessionWindow:
+    # Every tz offset is a whole number of minutes, so the window can't change within an epoch minute.
+    return _window_at(datetime.fromtimestamp(epoch_minute * 60, _tz(tz_name)))
 
 
-def get_session_window(tz_name: str) -> SessionWindow:
-    now = now_in_tz(tz_name)
+def _window_at(now: datetime) -> SessionWindow:
     t = now.timetz()
 
     start = time(0, 5, 0, tzinfo=t.tzinfo)